@@ -0,0 +1,75 @@
+"""Python interface to run analyses from other code, e.g. notebooks or scans of cut values:
+
+    import Analysis.API as API
+    results = API.run("ZAnalysis", "WW,ZZ", workers=4, MaxEvents=100000)
+    results["ZAnalysis"]["WW"].getHistogram("lep_pt").GetBinContent(10)
+
+The histograms are booked with the numpy HistogramBackend and returned together with the cutflows as Result objects,
+the workers send them back pickled. No output files are written unless asked for.
+"""
+
+import imp
+from multiprocessing import Pool
+
+import ColumnCache
+import DatasetCatalog
+import Job
+import JobSplitter
+import TupleReader
+import WorkerPool
+
+#======================================================================
+
+def run(analysis, samples = "", workers = 1, configuration = "Configurations/Configuration.py", write = False, **settings):
+    """Runs analysis (comma separated for several) on samples (comma separated or a list, all processes of the
+    configuration if empty) and returns {analysisName: {processName: Result}}. configuration is the location of a
+    configuration file or the imported module, settings override its Job settings. With workers > 1 the samples are
+    split into chunks that are run in parallel. With write the output files are written as by RunScript.py."""
+    if isinstance(configuration, basestring):
+        configuration = imp.load_source("Configuration", configuration)
+    jobConfiguration = dict(configuration.Job, **settings)
+    jobConfiguration.update(Analysis=analysis, Batch=True, HistogramBackend="numpy", WriteOutput=write)
+    if isinstance(samples, basestring):
+        samples = [sample.strip() for sample in samples.split(",") if sample.strip()]
+    jobs = [Job.Job(processName, jobConfiguration, configuration.Processes[processName]) for processName in (samples or sorted(configuration.Processes))]
+
+    if workers > 1:
+        pool = WorkerPool.createPool(jobConfiguration, workers) if jobConfiguration.get("WarmPool", False) else Pool(processes=workers)
+        try:
+            catalog = DatasetCatalog.sharedCatalog(jobConfiguration.get("CacheDirectory", "cache/"))
+            catalog.update([f for job in jobs for f in job.InputFiles], pool.map)
+            updateColumnCache(jobConfiguration, jobs, pool.map)
+            maxEntries = jobConfiguration.get("MaxEntriesPerJob", 0)
+            if maxEntries <= 0:
+                maxEntries = JobSplitter.automaticChunkSize(jobs, catalog, workers)
+            jobs = JobSplitter.splitJobs(jobs, catalog, maxEntries)
+            jobResults = pool.map(runJob, jobs, chunksize=1)
+            if write:
+                JobSplitter.mergeChunks(jobs, pool.map)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        updateColumnCache(jobConfiguration, jobs)
+        jobResults = map(runJob, jobs)
+
+    results = {}
+    for job, jobResult in zip(jobs, jobResults):
+        for analysisName, result in jobResult.items():
+            sampleResults = results.setdefault(analysisName, {})
+            if job.Name in sampleResults:
+                sampleResults[job.Name].add(result)
+            else:
+                sampleResults[job.Name] = result
+    return results
+
+def updateColumnCache(configuration, jobs, mapFunction = map):
+    """Converts the input files to the ColumnCache before the jobs are split, as RunScript.py does."""
+    if not (configuration.get("Columnar", False) and configuration.get("ColumnCache", False)): return
+    eventBranches, collections = TupleReader.batchBranches()
+    cache = ColumnCache.ColumnCache(configuration.get("CacheDirectory", "cache/"))
+    cache.update([f for job in jobs for f in job.InputFiles], eventBranches, collections, mapFunction)
+
+def runJob(job):
+    job.run()
+    return job.results()
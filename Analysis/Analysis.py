@@ -1,4 +1,5 @@
 import ROOT
+import numpy
 import time
 
 import TupleReader as reader
@@ -18,6 +19,13 @@ class Analysis(object):
         self.Name         = type(self).__name__
         self.TotName      = auxName + "." + self.Name
         self.isData       = False
+        # Expression over the raw branches in TTree::Draw syntax equivalent to the first cut of the analysis,
+        # the job only hands the entries passing it to the analysis (see Preselection)
+        self.Preselection = None
+        # Cut whose passing entries are written to a skim (see Job.writeSkim)
+        self.SkimCut      = None
+        self.SkimCutID    = None
+        self.SkimEntries  = []
 
         # Functionality providers
         self.Store        = reader.TupleReader()
@@ -33,23 +41,45 @@ class Analysis(object):
 
     #Execution functions
     def doInitialization(self):
+        # The cuts of the analysis are registered in initialize, between the two common ones
+        self.cut_all = self.addCut("all")
+        self.cut_Preselection = self.addCut("Preselection") if self.Preselection else None
         self.initialize()
+        self.cut_final = self.addCut("final")
       
     def initialize(self):
         pass
         
     def doAnalysis(self):
-        eventinfo = self.Store.getEventInfo()
-        weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
-        self.countEvent("all", weight)
+        weight = self.Store.getEventWeight() if not self.getIsData() else 1
+        self.countEvent(self.cut_all, weight)
+        if self.cut_Preselection is not None:
+            self.countEvent(self.cut_Preselection, weight)
         if self.analyze():
-            self.countEvent("final", weight)
+            self.countEvent(self.cut_final, weight)
         
     def analyze(self):
         return True
+
+    def doBatchAnalysis(self, batch, mask = None):
+        self.analyzeBatch(batch, mask)
+
+    def analyzeBatch(self, batch, mask = None):
+        """Entry point of the columnar mode, called once per EventBatch. Analyses may override this with a
+        vectorised implementation, by default the events of the batch are analysed one by one.
+        mask selects the events of the batch passing the preselection, None if all events are to be analysed.
+        """
+        for i in (xrange(len(batch)) if mask is None else numpy.flatnonzero(mask).tolist()):
+            self.Store.loadBatchEvent(i)
+            self.doAnalysis()
     
-    def doFinalization(self):
-        self.HistManager.writeHistograms()
+    def doFinalization(self, write = True):
+        """Writes the histograms and the cutflow to the current directory, or only flushes the histograms if write is off."""
+        if write:
+            self.HistManager.writeHistograms()
+            self.EventCounter.writeResults()
+        else:
+            self.HistManager.flushHistograms()
         self.EventCounter.printResults()
         self.finalize()
 
@@ -66,5 +96,14 @@ class Analysis(object):
     def getHistogram(self, histName):
         return self.HistManager.getHistogram(histName)
   
-    def countEvent(self, cut, weight):
-        self.EventCounter.update(cut, weight)
+    def addCut(self, cut):
+        return self.EventCounter.addCut(cut)
+
+    def addCuts(self, cuts):
+        return self.EventCounter.addCuts(cuts)
+
+    def countEvent(self, cutID, weight, count = 1):
+        """Counts the events passing the cut with ID cutID, as returned by addCut(s) in initialize."""
+        self.EventCounter.count(cutID, weight, count)
+        if cutID == self.SkimCutID:
+            self.SkimEntries.append(self.Store.CurrentEntry)
@@ -1,10 +1,24 @@
-import math
+import itertools
+import numpy
+
+import Constants
+import EventBatch
+import Kinematics
 
 """These helper functions implement three commonly used functionalities:
 The Object Selection Helpers represent standard object selections that serve as a starting point for
 self defined object selection strategies.
 The selectAndSortContainer function can be used to do selecting and sorting in a one liner.
 The StandardEventCuts function implements three standard cuts used in essentially all analyses.
+The Batch versions of the selection helpers evaluate the same cuts for all objects or events of an EventBatch
+at once and return boolean masks, selectAndSortBatch is the columnar equivalent of selectAndSortContainer.
+The Variable Definitions compute kinematic quantities with the Kinematics module, either for single objects
+or, in their Batch versions, for all events of an EventBatch at once.
+The Cached Selections store the standard selected objects and variables derived from them in the event cache of
+the TupleReader, so they are computed once per event no matter how often and by how many analyses they are used.
+The numeric variables are derived variables (see TupleReader.derived), which may be read from the DerivedCache.
+The Lepton Pairing Helpers search the best combination of same flavour opposite sign lepton pairs, e.g. for
+Z boson candidates.
 """
 
 
@@ -39,14 +53,173 @@ def selectAndSortContainer(container, selectingFunction, sortingFunction):
     selectedContainer = [particle for particle in container if selectingFunction(particle)]
     return sorted(selectedContainer, key=sortingFunction, reverse=True)
 
+# Cached Selections: the results are shared, the returned lists must not be modified
+def goodLeptons(store):
+    """Good leptons of the event, sorted by decreasing pt."""
+    return store.cached("GoodLeptons", lambda: selectAndSortContainer(store.getLeptons(), isGoodLepton, lambda p: p.pt()))
+
+def goodJets(store):
+    """Good jets of the event, sorted by decreasing pt."""
+    return store.cached("GoodJets", lambda: selectAndSortContainer(store.getJets(), isGoodJet, lambda p: p.pt()))
+
+def leadingDileptonMass(store):
+    """Invariant mass (mll) of the two leading good leptons, the event needs at least two good leptons."""
+    return store.derived("mll", lambda: invariantMass(*goodLeptons(store)[:2]))
+
+def leadingLeptonWTransverseMass(store):
+    """Transverse mass (mTW) of the leading good lepton and the missing transverse momentum."""
+    return store.derived("mTW", lambda: WTransverseMass(goodLeptons(store)[0], store.getEtMiss()))
+
+def nGoodJets(store):
+    return int(store.derived("nGoodJets", lambda: len(goodJets(store))))
+
+def nBTags(store):
+    """Number of good jets b-tagged by the MV1 algorithm at 80% efficiency."""
+    return int(store.derived("nBTags", lambda: sum([1 for jet in goodJets(store) if jet.mv1() > 0.7892])))
+
 # Event Selection Helpers
 def StandardEventCuts(eventinfo):
     if not (eventinfo.triggeredByElectron() or eventinfo.triggeredByMuon()): return False
     if not eventinfo.passGRL(): return False
     if not eventinfo.hasGoodVertex(): return False
     return True;
+
+# The standard event cuts as expression over the raw branches, for the preselection of the analyses
+StandardEventCutsExpression = "(trigE || trigM) && passGRL && hasGoodVertex"
+
+# Batch Selection Helpers
+# The masks are built from the same comparisons as the functions above (including the precedence of abs in
+# isGoodJet), so an object passes the mask exactly if it passes the corresponding function.
+def isGoodLeptonBatch(batch):
+    pdgId = numpy.abs(batch["lep_type"].content)
+    return ((pdgId == 11) & isGoodElectronBatch(batch)) | ((pdgId == 13) & isGoodMuonBatch(batch))
+
+def isGoodElectronBatch(batch):
+    return isTightIsolatedLeptonBatch(batch)
+
+def isGoodMuonBatch(batch):
+    return isTightIsolatedLeptonBatch(batch)
+
+def isTightIsolatedLeptonBatch(batch):
+    rawPt = batch["lep_pt"].content
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        isoetconerel20 = batch["lep_etcone20"].content/rawPt
+        isoptconerel30 = batch["lep_ptcone30"].content/rawPt
+    isTight = (batch["lep_flag"].content & 512) != 0
+    return isTight & (rawPt*0.001 > 25) & (isoetconerel20 < 0.15) & (isoptconerel30 < 0.15)
+
+def isGoodJetBatch(batch):
+    pt  = batch["jet_pt"].content*0.001
+    eta = batch["jet_eta"].content
+    return ~(pt < 25) & ~(eta > 2.5) & ~((pt < 50) & (eta < 2.4) & (batch["jet_jvf"].content < 0.5))
+
+def StandardEventCutsBatch(batch):
+    triggered = (batch["trigE"] != 0) | (batch["trigM"] != 0)
+    return triggered & (batch["passGRL"] != 0) & (batch["hasGoodVertex"] != 0)
+
+def selectAndSortBatch(sortKey, mask):
+    """Indices into the content of the JaggedArray sortKey of the elements passing mask, sorted by decreasing
+    sortKey within every event. Elements with equal keys keep their order, as in selectAndSortContainer.
+    The result is a JaggedArray with one entry per event."""
+    parents  = sortKey.parents()
+    selected = numpy.flatnonzero(mask)
+    order    = numpy.lexsort((-sortKey.content[selected], parents[selected]))
+    counts   = numpy.bincount(parents[selected], minlength=len(sortKey))
+    return EventBatch.JaggedArray.fromCounts(selected[order], counts)
     
     
 # Variable Definitions:
+def fourMomentum(particle):
+    return particle.pt(), particle.eta(), particle.phi(), particle.e()
+
+def invariantMass(*particles):
+    return Kinematics.invariantMass(*[fourMomentum(particle) for particle in particles])
+
 def WTransverseMass(lepton, etmiss):
-    return math.sqrt(2*lepton.pt()*etmiss.et()*(1-math.cos(lepton.tlv().DeltaPhi(etmiss.tlv()))));
\ No newline at end of file
+    return Kinematics.transverseMass(lepton.pt(), lepton.phi(), etmiss.et(), etmiss.phi())
+
+# Batch Variable Definitions:
+# Objects are addressed by their index in the flat content arrays of the EventBatch collections,
+# e.g. batch["lep_pt"].offsets[:-1] selects the first lepton of every event.
+def leptonFourMomenta(batch, index):
+    return (batch["lep_pt"].content[index]*0.001, batch["lep_eta"].content[index],
+            batch["lep_phi"].content[index],      batch["lep_E"].content[index]*0.001)
+
+def invariantMassBatch(batch, *indices):
+    return Kinematics.invariantMass(*[leptonFourMomenta(batch, index) for index in indices])
+
+def WTransverseMassBatch(batch, index):
+    event = batch["lep_pt"].parents()[index]
+    return Kinematics.transverseMass(batch["lep_pt"].content[index]*0.001, batch["lep_phi"].content[index],
+                                     batch["met_et"][event]*0.001, batch["met_phi"][event])
+
+
+# Lepton Pairing Helpers
+# A pairing is a tuple of disjoint lepton pairs (i, j) with i < j, ordered by their first index. Pairings are
+# enumerated in lexicographic order and the first one with the lowest score is chosen. This is the candidate
+# that a search over all permutations of the leptons with a strict < comparison of the scores finds.
+def isSFOSPair(lep1, lep2):
+    if lep1.charge()*lep2.charge() > 0: return False
+    if abs(lep1.pdgId()) != abs(lep2.pdgId()): return False
+    return True
+
+def SFOSPairMasses(leptons):
+    """Invariant masses of all same flavour opposite sign pairs, as a dictionary {(i, j): mass}."""
+    return dict([((i, j), invariantMass(leptons[i], leptons[j]))
+                 for i, j in itertools.combinations(range(len(leptons)), 2) if isSFOSPair(leptons[i], leptons[j])])
+
+def pairCombinations(pairs, nPairs):
+    """All combinations of nPairs disjoint pairs out of pairs, in lexicographic order."""
+    pairs = sorted(pairs)
+    def extend(combination, start, used):
+        if len(combination) == nPairs:
+            yield combination
+            return
+        for k in range(start, len(pairs)):
+            i, j = pairs[k]
+            if i in used or j in used: continue
+            for result in extend(combination + (pairs[k],), k+1, used | set(pairs[k])):
+                yield result
+    return extend((), 0, frozenset())
+
+def ZWindowScore(masses):
+    """Sum of the distances of the pair masses (last axis) to the Z boson mass."""
+    return numpy.abs(masses - Constants.Z_Mass).sum(axis=-1)
+
+def bestPairing(leptons, nPairs, score = ZWindowScore):
+    """Best combination of nPairs same flavour opposite sign pairs of leptons, returned as a tuple of index pairs
+    together with its score, or (None, None) if there is no such combination. score maps the array of pair
+    masses of a combination to a number, lower is better."""
+    masses = SFOSPairMasses(leptons)
+    best, bestScore = None, None
+    for combination in pairCombinations(masses.keys(), nPairs):
+        combinationScore = score(numpy.array([masses[pair] for pair in combination]))
+        if best is None or combinationScore < bestScore:
+            best, bestScore = combination, combinationScore
+    return best, bestScore
+
+def bestPairingBatch(batch, leptons, nPairs, score = ZWindowScore):
+    """Columnar version of bestPairing. leptons is a JaggedArray of flat lepton indices per event, e.g. the result
+    of selectAndSortBatch. Returns the flat lepton indices of the best pairing as an array of shape
+    (events, nPairs, 2), -1 for events without a valid combination, and the array of scores (inf for those).
+    The events are processed in groups of equal multiplicity, each group evaluates all combinations at once."""
+    nEvents   = len(leptons)
+    best      = numpy.full((nEvents, nPairs, 2), -1, dtype=numpy.int64)
+    bestScore = numpy.full(nEvents, numpy.inf)
+    counts    = leptons.counts()
+    charge    = batch["lep_charge"].content
+    flavour   = numpy.abs(batch["lep_type"].content)
+    for n in numpy.unique(counts[counts >= 2*nPairs]):
+        combinations = numpy.array(list(pairCombinations(itertools.combinations(range(n), 2), nPairs)), dtype=numpy.int64)
+        events  = numpy.flatnonzero(counts == n)
+        indices = leptons.content[leptons.offsets[events][:, None] + numpy.arange(n)][:, combinations]
+        first, second = indices[..., 0], indices[..., 1]
+        valid  = ~(charge[first]*charge[second] > 0) & (flavour[first] == flavour[second])
+        masses = Kinematics.invariantMass(leptonFourMomenta(batch, first), leptonFourMomenta(batch, second))
+        valid  = valid.all(axis=-1)
+        scores = numpy.where(valid, score(masses), numpy.inf)
+        choice = (numpy.arange(len(events)), numpy.argmin(scores, axis=1))
+        found  = valid[choice]
+        best[events[found]]      = indices[choice][found]
+        bestScore[events[found]] = scores[choice][found]
+    return best, bestScore
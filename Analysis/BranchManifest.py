@@ -0,0 +1,51 @@
+"""Record of the branches of the input tuples that an analysis reads.
+The branches are recorded by running the analysis with a recording TupleReader (see Job.recordBranches and the
+--record-branches option of RunScript.py) and stored in <CacheDirectory>/branches/<AnalysisName>.json together with
+the hash of the analysis code. A manifest is only used as long as this hash is unchanged.
+"""
+
+import importlib
+import json
+import os
+
+import RunManifest
+
+#======================================================================
+
+class BranchManifest(object):
+    """Per analysis lists of the branches read, stored as {"CodeHash", "Branches"} in one file per analysis."""
+    def __init__(self, cacheDirectory):
+        super(BranchManifest, self).__init__()
+        self.Directory  = os.path.join(cacheDirectory, "branches")
+        self.CodeHashes = {}
+
+    def location(self, analysisName):
+        return os.path.join(self.Directory, analysisName + ".json")
+
+    def codeHash(self, analysisName):
+        if analysisName not in self.CodeHashes:
+            self.CodeHashes[analysisName] = RunManifest.hashModules(importlib.import_module("Analysis." + analysisName))
+        return self.CodeHashes[analysisName]
+
+    def getBranches(self, analysisName):
+        """Recorded branches of the analysis, None if there is no record or the code changed since it was taken."""
+        location = self.location(analysisName)
+        if not os.path.exists(location):
+            return None
+        try:
+            with open(location) as manifestFile:
+                record = json.load(manifestFile)
+        except ValueError:
+            return None
+        if record.get("CodeHash") != self.codeHash(analysisName):
+            return None
+        return [str(branchname) for branchname in record["Branches"]]
+
+    def write(self, analysisName, branches):
+        if not os.path.exists(self.Directory):
+            os.makedirs(self.Directory)
+        location = self.location(analysisName)
+        temporaryLocation = "%s.%d.tmp" % (location, os.getpid())
+        with open(temporaryLocation, "w") as manifestFile:
+            json.dump({"CodeHash": self.codeHash(analysisName), "Branches": sorted(branches)}, manifestFile, indent=1)
+        os.rename(temporaryLocation, location)
@@ -0,0 +1,111 @@
+"""Uncompressed columnar copy of the input files for the columnar mode.
+Every input file is converted once into a directory <CacheDirectory>/columns/<key>/ that holds one .npy file per
+branch in the types of EventBatch.ColumnTypes. Event level branches have one value per entry. The per lepton and
+per jet branches are stored as flat content arrays, with one offsets file per collection (<counter>.offsets.npy).
+The key is built from the path, size and modification time of the file, so a changed file is converted again.
+The columns are opened with numpy.load(mmap_mode="r"): the batches are views of the mapped files, nothing is
+decompressed or converted while reading, and all processes reading a sample share its pages in the page cache.
+"""
+
+import ROOT
+import hashlib
+import numpy
+import os
+import shutil
+import time
+from numpy.lib.format import open_memmap
+
+import EventBatch
+
+# Number of entries read from the tree per TTree::Draw pass during the conversion
+ConversionChunkSize = 100000
+
+#======================================================================
+
+class ColumnCache(object):
+    """Converts input files into the column cache and opens the cached columns."""
+    def __init__(self, cacheDirectory, treeName = "mini"):
+        super(ColumnCache, self).__init__()
+        self.Directory = os.path.join(cacheDirectory, "columns")
+        self.TreeName  = treeName
+
+    def location(self, path):
+        stat = os.stat(path)
+        key  = "%s:%d:%r:%s" % (os.path.abspath(path), stat.st_size, stat.st_mtime, self.TreeName)
+        return os.path.join(self.Directory, hashlib.sha1(key).hexdigest())
+
+    def update(self, filenames, eventBranches, collections, mapFunction = map):
+        """Converts all files that are not cached yet. mapFunction may be replaced by Pool.map to convert in parallel."""
+        paths = sorted(set([os.path.abspath(f) for f in filenames if not os.path.isdir(self.location(f))]))
+        if not paths: return
+        self.log("Converting %d files" % len(paths))
+        mapFunction(convertFile, [(path, self.location(path), self.TreeName, eventBranches, collections) for path in paths])
+
+    def open(self, filename, eventBranches, collections):
+        """Memory maps the columns of filename, converting it first if necessary. Returns a dictionary of the event
+        level columns and of the content arrays of the collections, and a dictionary of the offsets per counter."""
+        location = self.location(filename)
+        if not os.path.isdir(location):
+            self.update([filename], eventBranches, collections)
+        columns = {}
+        for branchname, vartype in eventBranches + [branch for counterBranch, branches in collections for branch in branches]:
+            columns[branchname] = numpy.load(os.path.join(location, branchname + ".npy"), mmap_mode="r")
+        offsets = dict((counterBranch, numpy.load(os.path.join(location, counterBranch + ".offsets.npy"), mmap_mode="r"))
+                       for counterBranch, branches in collections)
+        return columns, offsets
+
+    def log(self, message):
+        print time.ctime() + " ColumnCache: " + message
+
+#======================================================================
+
+def convertFile(arguments):
+    """Writes the columns of a single file. Takes a (path, location, treeName, eventBranches, collections) tuple so
+    it can be used with Pool.map. The columns are written to a temporary directory that is renamed when complete."""
+    path, location, treeName, eventBranches, collections = arguments
+    rootFile = ROOT.TFile.Open(path, "READ")
+    tree = rootFile.Get(treeName)
+    nEntries = int(tree.GetEntries())
+    temporaryLocation = "%s.%d.tmp" % (location, os.getpid())
+    os.makedirs(temporaryLocation)
+
+    # the sizes of the content arrays are known from the counters
+    counters = EventBatch.readColumns(tree, [(counterBranch, "i") for counterBranch, branches in collections], 0, nEntries, nEntries)
+    offsets  = {}
+    columns  = {}
+    for counterBranch, branches in collections:
+        offsets[counterBranch] = numpy.zeros(nEntries+1, dtype=numpy.int64)
+        numpy.cumsum(counters[counterBranch], out=offsets[counterBranch][1:])
+        numpy.save(os.path.join(temporaryLocation, counterBranch + ".offsets.npy"), offsets[counterBranch])
+        for branchname, vartype in branches:
+            columns[branchname] = createColumn(temporaryLocation, branchname, vartype, int(offsets[counterBranch][-1]))
+    for branchname, vartype in eventBranches:
+        columns[branchname] = createColumn(temporaryLocation, branchname, vartype, nEntries)
+
+    for first in xrange(0, nEntries, ConversionChunkSize):
+        n = min(ConversionChunkSize, nEntries - first)
+        batch = EventBatch.readBatch(tree, first, n, eventBranches, collections)
+        for branchname, vartype in eventBranches:
+            columns[branchname][first:first+n] = batch[branchname]
+        for counterBranch, branches in collections:
+            begin, end = offsets[counterBranch][first], offsets[counterBranch][first+n]
+            for branchname, vartype in branches:
+                columns[branchname][begin:end] = batch[branchname].content
+    rootFile.Close()
+    for column in columns.values():
+        if isinstance(column, numpy.memmap):
+            column.flush()
+    del columns
+
+    try:
+        os.rename(temporaryLocation, location)
+    except OSError: # converted by another job in the meantime
+        shutil.rmtree(temporaryLocation)
+
+def createColumn(directory, branchname, vartype, size):
+    """Creates the .npy file of a column with size values and returns it as a writable array."""
+    location = os.path.join(directory, branchname + ".npy")
+    if size == 0:
+        numpy.save(location, numpy.zeros(0, dtype=EventBatch.ColumnTypes[vartype]))
+        return numpy.zeros(0, dtype=EventBatch.ColumnTypes[vartype])
+    return open_memmap(location, mode="w+", dtype=EventBatch.ColumnTypes[vartype], shape=(size,))
@@ -0,0 +1,106 @@
+"""Estimation of the run time of jobs for the scheduling of the worker pool.
+The cost of a job is its number of entries divided by the processing rate (entries per second) measured in earlier
+runs of the same analyses on the same sample. The rates are stored in <CacheDirectory>/timing.json. Samples that
+were never run with the analyses are estimated with the rate of the analyses on all samples, then with DefaultRate.
+"""
+
+import json
+import os
+import time
+
+import Job
+
+# Rate assumed when there is no measurement for the analyses at all, in entries per second
+DefaultRate = 5000.
+
+# Weight of the earlier measurements when a new one is added, so the rates follow changes of the code
+HistoryWeight = 0.5
+
+#======================================================================
+
+class CostModel(object):
+    """Measured entries and seconds per analyses and sample: {analyses: {processName: {"Entries", "Seconds"}}}."""
+    def __init__(self, cacheDirectory):
+        super(CostModel, self).__init__()
+        self.Location = os.path.join(cacheDirectory, "timing.json")
+        self.Rates    = self.read()
+        self.Measured = {}
+
+    # Persistency
+    def read(self):
+        if not os.path.exists(self.Location):
+            return {}
+        try:
+            with open(self.Location) as timingFile:
+                return json.load(timingFile)
+        except ValueError:
+            return {}
+
+    def save(self):
+        """Adds the measurements of this run, the earlier ones of the same analyses and sample are weighted down by
+        HistoryWeight."""
+        if not self.Measured: return
+        directory = os.path.dirname(self.Location)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        rates = self.read()
+        for key, samples in self.Measured.items():
+            for processName, (entries, seconds) in samples.items():
+                previous = rates.setdefault(key, {}).get(processName, {"Entries": 0, "Seconds": 0.})
+                rates[key][processName] = {
+                    "Entries" : HistoryWeight*previous["Entries"] + entries,
+                    "Seconds" : HistoryWeight*previous["Seconds"] + seconds,
+                }
+        temporaryLocation = "%s.%d.tmp" % (self.Location, os.getpid())
+        with open(temporaryLocation, "w") as timingFile:
+            json.dump(rates, timingFile, indent=1, sort_keys=True)
+        os.rename(temporaryLocation, self.Location)
+        self.Rates    = rates
+        self.Measured = {}
+
+    # Estimation
+    def rate(self, job):
+        samples = self.Rates.get(analysesKey(job), {})
+        measurements = [samples[job.Name]] if job.Name in samples else samples.values()
+        entries = sum([measurement["Entries"] for measurement in measurements])
+        seconds = sum([measurement["Seconds"] for measurement in measurements])
+        return entries/seconds if entries > 0 and seconds > 0 else DefaultRate
+
+    def predict(self, job, catalog):
+        """Expected run time of job in seconds."""
+        return jobEntries(job, catalog)/self.rate(job)
+
+    def record(self, job, entries, seconds):
+        """Adds the measured run time of a job, the chunks of a sample are summed until the next save."""
+        samples = self.Measured.setdefault(analysesKey(job), {})
+        previousEntries, previousSeconds = samples.get(job.Name, (0, 0.))
+        samples[job.Name] = (previousEntries + entries, previousSeconds + seconds)
+
+    def report(self, jobs, predictions, times):
+        """Logs the predicted against the measured run time per sample and in total."""
+        samples = {}
+        for job, prediction, seconds in zip(jobs, predictions, times):
+            predicted, measured = samples.get(job.Name, (0., 0.))
+            samples[job.Name] = (predicted + prediction, measured + seconds)
+        for processName, (predicted, measured) in sorted(samples.items()):
+            self.log("%s: predicted %.1fs, took %.1fs" % (processName, predicted, measured))
+        self.log("Total: predicted %.1fs, took %.1fs" % (sum(predictions), sum(times)))
+
+    def log(self, message):
+        print time.ctime() + " CostModel: " + message
+
+#======================================================================
+
+def analysesKey(job):
+    return ",".join(sorted(job.AnalysisNames))
+
+def jobEntries(job, catalog):
+    if job.EntryRange is not None:
+        return job.EntryRange[1] - job.EntryRange[0]
+    return Job.entriesToProcess(job.Configuration, catalog.getEntries(job.InputFiles))
+
+def schedule(jobs, predictions):
+    """Orders the jobs longest expected first. Handed to the pool one at a time, the remaining jobs go to whichever
+    worker becomes free next, so the short jobs at the end fill the gaps."""
+    order = sorted(range(len(jobs)), key=lambda i: predictions[i], reverse=True)
+    return [jobs[i] for i in order], [predictions[i] for i in order]
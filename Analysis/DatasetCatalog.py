@@ -0,0 +1,119 @@
+import ROOT
+import json
+import os
+import time
+
+#======================================================================
+
+# Branches for which the largest value per file is stored, used to size the TupleReader buffers
+MaximumBranches = ["lep_n", "alljet_n"]
+
+class DatasetCatalog(object):
+    """Persistent catalog of the metadata of the input files (number of entries, maxima of the
+    object counters, file size and tree name). The information is gathered once per file and stored in
+    <CacheDirectory>/catalog.json. An entry is rescanned as soon as the size or modification time of its file
+    changes. Using the catalog avoids the full scans of the input chains (GetEntries, GetMaximum) at the
+    start of every job.
+    """
+    def __init__(self, cacheDirectory, treeName = "mini"):
+        super(DatasetCatalog, self).__init__()
+        self.Location = os.path.join(cacheDirectory, "catalog.json")
+        self.TreeName = treeName
+        self.Files    = self.read()
+        self.Updated  = {}
+
+    # Persistency
+    def read(self):
+        if not os.path.exists(self.Location):
+            return {}
+        try:
+            with open(self.Location) as catalogFile:
+                return json.load(catalogFile)
+        except ValueError:
+            self.log("Catalog %s is corrupted and will be rebuilt" % self.Location)
+            return {}
+
+    def save(self):
+        """Writes the entries updated by this instance. Other processes may have updated the catalog in
+        the meantime, so the file is reread and merged before it is replaced atomically."""
+        if not self.Updated: return
+        directory = os.path.dirname(self.Location)
+        if directory and not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                pass
+        files = self.read()
+        files.update(self.Updated)
+        temporaryLocation = "%s.%d.tmp" % (self.Location, os.getpid())
+        with open(temporaryLocation, "w") as catalogFile:
+            json.dump(files, catalogFile, indent=1, sort_keys=True)
+        os.rename(temporaryLocation, self.Location)
+        self.Files   = files
+        self.Updated = {}
+
+    # Access functions
+    def isValid(self, path):
+        info = self.Files.get(path)
+        if info is None or info["TreeName"] != self.TreeName: return False
+        stat = os.stat(path)
+        return info["Size"] == stat.st_size and info["MTime"] == stat.st_mtime
+
+    def update(self, filenames, mapFunction = map):
+        """Scans all files that are missing or outdated. mapFunction may be replaced by Pool.map to scan in parallel."""
+        paths = [os.path.abspath(f) for f in filenames]
+        stale = sorted(set([path for path in paths if not self.isValid(path)]))
+        if not stale: return
+        self.log("Scanning %d files" % len(stale))
+        for path, info in zip(stale, mapFunction(scanFile, [(path, self.TreeName) for path in stale])):
+            self.Files[path]   = info
+            self.Updated[path] = info
+        self.save()
+
+    def getFileInfo(self, filename):
+        path = os.path.abspath(filename)
+        if not self.isValid(path):
+            self.update([path])
+        return self.Files[path]
+
+    def getEntries(self, filenames):
+        return sum([self.getFileInfo(f)["Entries"] for f in filenames])
+
+    def getMaximum(self, filenames, branchname):
+        return max([self.getFileInfo(f)["Maxima"][branchname] for f in filenames] + [0])
+
+    def getMaxima(self, filenames):
+        return dict([(branchname, self.getMaximum(filenames, branchname)) for branchname in MaximumBranches])
+
+    def log(self, message):
+        print time.ctime() + " DatasetCatalog: " + message
+
+#======================================================================
+
+# Catalogs opened by this process, see sharedCatalog
+Catalogs = {}
+
+def sharedCatalog(cacheDirectory, treeName = "mini"):
+    """Catalog that is read once per process and reused by all jobs run in it. Entries of files changed in the
+    meantime are still rescanned, as their size or modification time no longer match."""
+    key = (cacheDirectory, treeName)
+    if key not in Catalogs:
+        Catalogs[key] = DatasetCatalog(cacheDirectory, treeName)
+    return Catalogs[key]
+
+def scanFile(arguments):
+    """Reads the metadata of a single file. Takes a (path, treeName) tuple so it can be used with Pool.map."""
+    path, treeName = arguments
+    stat = os.stat(path)
+    rootFile = ROOT.TFile.Open(path, "READ")
+    tree = rootFile.Get(treeName)
+    entries = int(tree.GetEntries()) if tree else 0
+    info = {
+        "TreeName" : treeName,
+        "Size"     : stat.st_size,
+        "MTime"    : stat.st_mtime,
+        "Entries"  : entries,
+        "Maxima"   : dict([(branchname, int(tree.GetMaximum(branchname)) if entries else 0) for branchname in MaximumBranches]),
+    }
+    rootFile.Close()
+    return info
@@ -0,0 +1,77 @@
+"""Cache of numeric per event variables derived from the input files, see TupleReader.derived.
+The variables of every input file are stored in <CacheDirectory>/derived/<key>/<name>.npy as arrays with one value per
+entry of the file, NaN for the entries the variable was never computed for. The key is built from the path, size and
+modification time of the file and from the hash of the code computing the variables, including the analyses of the
+job (see Job.derivedCodeHash), so changing either discards them.
+"""
+
+import hashlib
+import numpy
+import os
+
+import RunManifest
+
+#======================================================================
+
+class DerivedCache(object):
+    """Reads and extends the stored derived variables of the input files."""
+    def __init__(self, cacheDirectory, codeHash, treeName = "mini"):
+        super(DerivedCache, self).__init__()
+        self.Directory = os.path.join(cacheDirectory, "derived")
+        self.CodeHash  = codeHash
+        self.TreeName  = treeName
+
+    def location(self, path):
+        stat = os.stat(path)
+        key  = "%s:%d:%r:%s:%s" % (os.path.abspath(path), stat.st_size, stat.st_mtime, self.TreeName, self.CodeHash)
+        return os.path.join(self.Directory, hashlib.sha1(key).hexdigest())
+
+    def load(self, path):
+        """Dictionary of the variables stored for the file path, memory mapped."""
+        location = self.location(path)
+        if not os.path.isdir(location):
+            return {}
+        return dict((filename[:-4], numpy.load(os.path.join(location, filename), mmap_mode="r"))
+                    for filename in os.listdir(location) if filename.endswith(".npy") and not filename.endswith(".tmp.npy"))
+
+    def update(self, path, nEntries, values):
+        """Adds values, a dictionary {name: (entries, values)}, for the file path with nEntries entries. Jobs running
+        on other parts of the same file may update it at the same time, values lost in this case are recomputed."""
+        location = self.location(path)
+        for name, (entries, newValues) in values.items():
+            updateColumn(location, name, nEntries, numpy.array(entries, dtype=numpy.int64), newValues)
+
+#======================================================================
+
+def updateColumn(location, name, nEntries, entries, values):
+    """Sets the entries of the column name stored in the directory location, which is created if needed."""
+    if not os.path.isdir(location):
+        try:
+            os.makedirs(location)
+        except OSError: # created by another job in the meantime
+            pass
+    columnLocation = os.path.join(location, name + ".npy")
+    if os.path.exists(columnLocation):
+        column = numpy.array(numpy.load(columnLocation))
+    else:
+        column = numpy.full(nEntries, numpy.nan)
+    column[entries] = values
+    temporaryLocation = "%s.%d.tmp.npy" % (columnLocation[:-4], os.getpid())
+    numpy.save(temporaryLocation, column)
+    os.rename(temporaryLocation, columnLocation)
+
+def merge(sourceCacheDirectory, cacheDirectory):
+    """Adds the values stored by a DerivedCache in sourceCacheDirectory to the one in cacheDirectory, e.g. the values
+    computed by an attempt of a WorkQueue task."""
+    source = os.path.join(sourceCacheDirectory, "derived")
+    if not os.path.isdir(source): return
+    for key in os.listdir(source):
+        for filename in os.listdir(os.path.join(source, key)):
+            if not filename.endswith(".npy") or filename.endswith(".tmp.npy"): continue
+            column = numpy.load(os.path.join(source, key, filename))
+            entries = numpy.flatnonzero(column == column)
+            updateColumn(os.path.join(cacheDirectory, "derived", key), filename[:-4], len(column), entries, column[entries])
+
+def codeHash(modules):
+    """Hash of the source code of the given modules of the Analysis package and of the modules they depend on."""
+    return hashlib.sha1(",".join([RunManifest.hashModules(module) for module in modules])).hexdigest()
@@ -0,0 +1,112 @@
+"""Columnar representation of the input tuples.
+An EventBatch holds a chunk of consecutive entries of the input chain as numpy arrays. Event level branches
+are stored as one array per branch, the per lepton and per jet branches as JaggedArrays (one flat content
+array plus an offset array per collection).
+The branches are read with TTree::Draw, so each chunk is filled by a few native passes over the tree
+instead of one GetEntry call per event.
+"""
+
+import numpy
+
+# TTree::Draw returns doubles, these are the types the columns are converted to afterwards.
+# Floating point branches are kept in double precision so that values are identical to the ones
+# the event based TupleReader hands out (array('f') element converted to a python float).
+ColumnTypes = {"f": numpy.float64, "i": numpy.int64, "b": numpy.int8}
+
+#======================================================================
+
+class JaggedArray(object):
+    """Variable length per event array. The values of event i are content[offsets[i]:offsets[i+1]]."""
+    def __init__(self, content, offsets):
+        super(JaggedArray, self).__init__()
+        self.content = content
+        self.offsets = offsets
+
+    @classmethod
+    def fromCounts(cls, content, counts):
+        offsets = numpy.zeros(len(counts)+1, dtype=numpy.int64)
+        numpy.cumsum(counts, out=offsets[1:])
+        return cls(content, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.content[self.offsets[i]:self.offsets[i+1]]
+
+    def counts(self):
+        return numpy.diff(self.offsets)
+
+    def starts(self):
+        return self.offsets[:-1]
+
+    def parents(self):
+        """Index of the event each element of the content belongs to."""
+        return numpy.repeat(numpy.arange(len(self)), self.counts())
+
+#======================================================================
+
+class EventBatch(object):
+    """A chunk of nEntries consecutive entries starting at firstEntry. Columns are accessed by
+    their branch name, e.g. batch["trigE"] or batch["lep_pt"]."""
+    def __init__(self, firstEntry, nEntries):
+        super(EventBatch, self).__init__()
+        self.FirstEntry = firstEntry
+        self.NEntries   = nEntries
+        self.Columns    = {}
+
+    def __len__(self):
+        return self.NEntries
+
+    def __getitem__(self, branchname):
+        return self.Columns[branchname]
+
+    def __contains__(self, branchname):
+        return branchname in self.Columns
+
+    def entries(self):
+        return numpy.arange(self.FirstEntry, self.FirstEntry + self.NEntries)
+
+#======================================================================
+
+def readColumns(tree, branches, firstEntry, nEntries, nRows):
+    """Reads the given (branchname, vartype) pairs for nEntries entries starting at firstEntry.
+    Up to four branches are evaluated per TTree::Draw pass. All branches have to yield the same
+    number of rows (nRows), i.e. they are either all event level or all of the same collection."""
+    columns = {}
+    if nRows == 0:
+        for branchname, vartype in branches:
+            columns[branchname] = numpy.zeros(0, dtype=ColumnTypes[vartype])
+        return columns
+
+    tree.SetEstimate(nRows + 1)
+    for i in range(0, len(branches), 4):
+        group = branches[i:i+4]
+        tree.Draw(":".join([branchname for branchname, vartype in group]), "", "goff", nEntries, firstEntry)
+        for j, (branchname, vartype) in enumerate(group):
+            values = getattr(tree, "GetV%d" % (j+1))()
+            columns[branchname] = toNumpy(values, nRows).astype(ColumnTypes[vartype])
+    return columns
+
+def toNumpy(buffer, size):
+    # Older PyROOT versions hand out unsized buffers, newer ones low level views that have to be reshaped
+    try:
+        buffer.SetSize(size)
+    except AttributeError:
+        buffer.reshape((size,))
+    return numpy.frombuffer(buffer, dtype=numpy.float64, count=size)
+
+def readBatch(tree, firstEntry, nEntries, eventBranches, collections):
+    """Reads an EventBatch. eventBranches is a list of (branchname, vartype) pairs for the event level
+    branches, collections a list of (counterBranch, branches) pairs for the jagged branches, where the
+    counter branch has to be part of the event level branches."""
+    batch = EventBatch(firstEntry, nEntries)
+    batch.Columns.update(readColumns(tree, eventBranches, firstEntry, nEntries, nEntries))
+
+    for counterBranch, branches in collections:
+        counts  = batch[counterBranch].astype(numpy.int64)
+        offsets = numpy.zeros(nEntries+1, dtype=numpy.int64)
+        numpy.cumsum(counts, out=offsets[1:])
+        for branchname, content in readColumns(tree, branches, firstEntry, nEntries, int(offsets[-1])).items():
+            batch.Columns[branchname] = JaggedArray(content, offsets)
+    return batch
@@ -1,29 +1,113 @@
 import ROOT
-import collections
+import json
+import numpy
+import os
 import time
 
+# Names of the cutflow histograms in the output files
+RawCutflowName      = "cutflow_raw"
+WeightedCutflowName = "cutflow_weighted"
+
 #======================================================================
 
 class EventCounter(object):
-    """Event counting faclility for the analysis class."""
+    """Event counting faclility for the analysis class.
+    The cuts are registered once, in the order in which they are applied, and get consecutive integer IDs.
+    The raw and weighted counts are kept in lists indexed by these IDs, so counting an event through the ID of its
+    cut is a list increment, and the cutflow is always reported in the order of registration.
+    """
     def __init__(self, name):
         super(EventCounter, self).__init__()
         self.Name = name
-        self.RawCounter      = collections.Counter()
-        self.WeightedCounter = collections.Counter()
-    
+        self.Cuts     = []
+        self.CutIDs   = {}
+        self.Raw      = []
+        self.Weighted = []
+
+    # Cut table
+    def addCut(self, cut):
+        """Registers cut if it is not known yet and returns its ID."""
+        if cut not in self.CutIDs:
+            self.CutIDs[cut] = len(self.Cuts)
+            self.Cuts.append(cut)
+            self.Raw.append(0)
+            self.Weighted.append(0.)
+        return self.CutIDs[cut]
+
+    def addCuts(self, cuts):
+        return [self.addCut(cut) for cut in cuts]
+
+    # Output
     def printResults(self):
         self.log("+----------------------------------------------------------------+")
-        for item, value in self.RawCounter.most_common():
-            self.log("|%20s : %20i : %17.2f |" %(item, value, self.WeightedCounter[item]))
+        for cut, raw, weighted in self.results():
+            self.log("|%20s : %20i : %17.2f |" %(cut, raw, weighted))
         self.log("+----------------------------------------------------------------+")
-    
+
+    def results(self):
+        return [(cut, int(self.Raw[i]), float(self.Weighted[i])) for i, cut in enumerate(self.Cuts)]
+
+    def writeJSON(self, location):
+        """Writes the cutflow as a machine readable list of {"Cut", "Events", "Weighted"} entries."""
+        cutflow = [{"Cut": cut, "Events": raw, "Weighted": weighted} for cut, raw, weighted in self.results()]
+        with open(location, "w") as cutflowFile:
+            json.dump({"Name": self.Name, "Cutflow": cutflow}, cutflowFile, indent=1)
+
+    def writeResults(self):
+        """Writes the counters to the current directory as two histograms with one labelled bin per cut,
+        which allows to merge the cutflows of several jobs."""
+        nBins = max(len(self.Cuts), 1)
+        raw      = ROOT.TH1D(RawCutflowName,      "Cutflow;;Events",          nBins, 0, nBins)
+        weighted = ROOT.TH1D(WeightedCutflowName, "Weighted Cutflow;;Events", nBins, 0, nBins)
+        for i, cut in enumerate(self.Cuts):
+            for hist, content in [(raw, self.Raw[i]), (weighted, self.Weighted[i])]:
+                hist.GetXaxis().SetBinLabel(i+1, cut)
+                hist.SetBinContent(i+1, content)
+        raw.Write()
+        weighted.Write()
+
+    def readResults(self, rootFile):
+        """Adds the counters stored in rootFile by writeResults."""
+        raw      = rootFile.Get(RawCutflowName)
+        weighted = rootFile.Get(WeightedCutflowName)
+        if not raw or not weighted: return
+        for i in range(1, raw.GetNbinsX()+1):
+            cut = raw.GetXaxis().GetBinLabel(i)
+            if cut == "": continue
+            self.update(cut, weighted.GetBinContent(i), int(raw.GetBinContent(i)))
+
     def log(self, message):
         print time.ctime() + " EventStatistics " + self.Name + ": " + message
-        
-    # Utility function      
-    def update(self, cut, weight):
-        self.RawCounter.update([cut])
-        self.WeightedCounter[cut] += weight
-        
-        
\ No newline at end of file
+
+    # Utility function
+    def count(self, cutID, weight, count = 1):
+        """Counts count events passing the cut with ID cutID, weight is their summed weight."""
+        self.Raw[cutID]      += count
+        self.Weighted[cutID] += weight
+
+    def update(self, cut, weight, count = 1):
+        """Counts count events passing the cut named cut, which is registered if unknown."""
+        self.count(self.addCut(cut), weight, count)
+
+    def add(self, other):
+        """Adds the counts of the EventCounter other, e.g. of another chunk of the same sample."""
+        for cut, raw, weighted in other.results():
+            self.update(cut, weighted, raw)
+
+    def updateBatch(self, lastCuts, weights):
+        """Counts a batch of events. lastCuts holds for every event the ID of the last cut it passed (-1 if it
+        failed the first one), an event is counted for all cuts up to and including its last cut."""
+        nCuts    = len(self.Cuts)
+        lastCuts = numpy.asarray(lastCuts, dtype=numpy.int64) + 1
+        raw      = numpy.bincount(lastCuts, minlength=nCuts+1)
+        weighted = numpy.bincount(lastCuts, numpy.asarray(weights, dtype=numpy.float64), minlength=nCuts+1)
+        raw      = numpy.cumsum(raw[::-1])[::-1][1:]
+        weighted = numpy.cumsum(weighted[::-1])[::-1][1:]
+        for cutID in range(nCuts):
+            self.count(cutID, float(weighted[cutID]), int(raw[cutID]))
+
+#======================================================================
+
+def cutflowLocation(outputLocation):
+    """Location of the cutflow dump belonging to the output file outputLocation."""
+    return os.path.splitext(outputLocation)[0] + ".cutflow.json"
@@ -3,6 +3,7 @@ import math
 import Analysis
 import AnalysisHelpers as AH
 import Constants
+import Kinematics
 
 #======================================================================
 
@@ -13,8 +14,11 @@ class HWWAnalysis(Analysis.Analysis):
   """
   def __init__(self, store):
       super(HWWAnalysis, self).__init__(store)
+      self.Preselection = AH.StandardEventCutsExpression
 
   def initialize(self):
+      self.cut_EventCuts, self.cut_2_high_pt_Leptons, self.cut_Jets = self.addCuts(["EventCuts", "2 high pt Leptons", "Jets"])
+
       self.hist_vismass         = self.addHistogram("vismass",            ROOT.TH1D("vismass", "Visible Mass; M^{vis}_{ll};Events", 20, 0, 200))
       self.hist_ptLL            = self.addHistogram("ptll",               ROOT.TH1D("ptll", "Tranvsere Momentum of Dilepton System; p_{T,ll};Events", 20,0,200))
       self.hist_deltaPhiLL      = self.addHistogram("deltaphill",         ROOT.TH1D("deltaphill", "Azimuthal Opening Angle between Leptons; #|Delta#phi_{ll}|;Events", 16, 0, 1.6))
@@ -51,30 +55,33 @@ class HWWAnalysis(Analysis.Analysis):
   def analyze(self):
       # retrieving objects
       eventinfo = self.Store.getEventInfo()
-      weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
-      self.countEvent("no cut", weight)
+      weight = self.Store.getEventWeight() if not self.getIsData() else 1
       
       # apply standard event based selection
       if not AH.StandardEventCuts(eventinfo): return False
-      self.countEvent("EventCuts", weight)
+      self.countEvent(self.cut_EventCuts, weight)
 
       # Lepton Requirements
-      GoodLeptons = AH.selectAndSortContainer(self.Store.getLeptons(), AH.isGoodLepton, lambda p: p.pt())
+      GoodLeptons = AH.goodLeptons(self.Store)
       if not (len(GoodLeptons) == 2): return False
-      self.countEvent("2 high pt Leptons", weight)
+      self.countEvent(self.cut_2_high_pt_Leptons, weight)
 
       leadLepton  = GoodLeptons[0]
       trailLepton = GoodLeptons[1]
 
-      jets = AH.selectAndSortContainer(self.Store.getJets(), AH.isGoodJet, lambda p: p.pt())
+      jets = AH.goodJets(self.Store)
       if not len(jets) == 0: return False
-      self.countEvent("Jets", weight)
+      self.countEvent(self.cut_Jets, weight)
 
       etmiss    = self.Store.getEtMiss() 
 
       # background suppresion
-      combTLV = leadLepton.tlv() + trailLepton.tlv() 
-      mll = combTLV.M()
+      leadP4  = AH.fourMomentum(leadLepton)
+      trailP4 = AH.fourMomentum(trailLepton)
+      px, py, pz, e = Kinematics.fourMomentumSum(leadP4, trailP4)
+      mll  = Kinematics.mass(px, py, pz, e)
+      ptll = Kinematics.transverseMomentum(px, py)
+      deltaPhiLL = Kinematics.deltaPhi(leadLepton.phi(), trailLepton.phi())
       if not leadLepton.charge()*trailLepton.charge() < 0: return False
       if (abs(leadLepton.pdgId()) == abs(trailLepton.pdgId())):
           if not mll > 12: return False
@@ -84,12 +91,12 @@ class HWWAnalysis(Analysis.Analysis):
           if not mll > 10: return False
           if not etmiss.et() > 20: return False
 
-      if not combTLV.Pt() > 30: return False
-      if not combTLV.DeltaPhi(etmiss.tlv()) > math.pi/2.0: return False
+      if not ptll > 30: return False
+      if not Kinematics.deltaPhi(Kinematics.azimuth(px, py), etmiss.phi()) > math.pi/2.0: return False
 
       # Higgs to WW topology
-      if not combTLV.M() < 55: return False
-      if not leadLepton.tlv().DeltaPhi(trailLepton.tlv()) < 1.8: return False
+      if not mll < 55: return False
+      if not deltaPhiLL < 1.8: return False
 
       # Missing Et histograms
       self.hist_etmiss.Fill(etmiss.et(),weight)
@@ -98,9 +105,9 @@ class HWWAnalysis(Analysis.Analysis):
       self.hist_vxp_z.Fill(eventinfo.primaryVertexPosition(), weight)
       self.hist_pvxp_n.Fill(eventinfo.numberOfVertices(), weight)
       
-      self.hist_vismass.Fill(combTLV.M(), weight)
-      self.hist_ptLL.Fill(combTLV.Pt(), weight)
-      self.hist_deltaPhiLL.Fill(abs(leadLepton.tlv().DeltaPhi(trailLepton.tlv())), weight)
+      self.hist_vismass.Fill(mll, weight)
+      self.hist_ptLL.Fill(ptll, weight)
+      self.hist_deltaPhiLL.Fill(abs(deltaPhiLL), weight)
 
       # Leading Lepton histograms
       self.hist_leadleptpt.Fill(leadLepton.pt(), weight)
@@ -1,21 +1,81 @@
 import ROOT
+import numpy
 import time
+import Histogram
 import StandardHistograms as SH
 
 #======================================================================
 
+# Number of fills collected per histogram before they are passed to ROOT
+BufferSize = 4096
+
+class BufferedHistogram(object):
+    """Wrapper of a histogram that collects the values and weights of the calls to Fill in numpy buffers.
+    The buffer is passed to the histogram with a single TH1::FillN call whenever it is full and before
+    the histogram is used otherwise: all other attributes are forwarded to the wrapped histogram after
+    flushing, so the wrapper can be used in place of the histogram. TH1::FillN fills the values one by one
+    in the order given, the result is identical to calling Fill directly.
+    """
+    def __init__(self, histogram, bufferSize = BufferSize):
+        super(BufferedHistogram, self).__init__()
+        self.Histogram = histogram
+        self.Values    = numpy.empty(bufferSize)
+        self.Weights   = numpy.empty(bufferSize)
+        self.NBuffered = 0
+
+    def Fill(self, value, weight = 1.):
+        self.Values[self.NBuffered]  = value
+        self.Weights[self.NBuffered] = weight
+        self.NBuffered += 1
+        if self.NBuffered == len(self.Values):
+            self.flush()
+
+    def FillN(self, n, values, weights = None):
+        """Fills the first n values with the given weights (or weight one), same signature as TH1::FillN. values
+        and weights may be numpy arrays, e.g. columns of an EventBatch."""
+        self.flush()
+        values  = numpy.ascontiguousarray(values[:n], dtype=numpy.float64)
+        weights = numpy.ones(n) if weights is None else numpy.ascontiguousarray(weights[:n], dtype=numpy.float64)
+        if n:
+            self.Histogram.FillN(n, values, weights)
+
+    def flush(self):
+        if self.NBuffered:
+            self.Histogram.FillN(self.NBuffered, self.Values, self.Weights)
+            self.NBuffered = 0
+
+    def __getattr__(self, name):
+        # special and own attributes are not forwarded, they are looked up before __init__ ran, e.g. when unpickling
+        if name.startswith("_") or name in ("Histogram", "Values", "Weights", "NBuffered"): raise AttributeError(name)
+        self.flush()
+        return getattr(self.Histogram, name)
+
+#======================================================================
+
+# Histogram classes that can be used to book the histograms, selected by the HistogramBackend job setting
+Backends = {
+    "ROOT"  : ROOT.TH1D,
+    "numpy" : Histogram.Histogram,
+}
+
 class HistManager(object):    
-    """Histogram managing tool for the analysis class."""
-    def __init__(self, name):
+    """Histogram managing tool for the analysis class.
+    With the numpy backend all histograms are booked as Histogram objects, histograms handed in as ROOT
+    histograms are replaced by an empty Histogram with the same binning. They are converted to TH1D when written.
+    """
+    def __init__(self, name, backend = "ROOT"):
         super(HistManager, self).__init__()
         # Configurable
         self.Name = name
+        self.HistogramClass = Backends[backend]
 
         self.Histograms = {}
 
+    def setBackend(self, backend):
+        self.HistogramClass = Backends[backend]
+
 
     def getHistogram(self, histName):
-        return self.HistManager.getHistogram(histName)
         if histName in self.Histograms:
             return self.Histograms[histName]
         else:
@@ -25,19 +85,27 @@ class HistManager(object):
     def addHistogram(self, histName, histogram):
         if histName in self.Histograms:
             print "Histogram with name " + histName + " already defined!"
-        else:
-            self.Histograms[histName] = histogram
-        return histogram
+            return histogram
+        if self.HistogramClass is Histogram.Histogram and not isinstance(histogram, Histogram.Histogram):
+            histogram = Histogram.Histogram.fromTH1(histogram)
+        self.Histograms[histName] = BufferedHistogram(histogram)
+        return self.Histograms[histName]
         
     def addStandardHistogram(self, histName):
-        histogram = SH.getStandardHistogram(histName)
+        histogram = SH.getStandardHistogram(histName, self.HistogramClass)
         if histogram is None: 
             self.log("Histogram with name " + histName + " not found")
             return None
         return self.addHistogram(histName, histogram)
 
+    def flushHistograms(self):
+        for hist in self.Histograms.values():
+            hist.flush()
+
     def writeHistograms(self):
-        [hist.Write() for hist in self.Histograms.values()]
+        for hist in self.Histograms.values():
+            hist.flush()
+            hist.Write()
 
     # Utility function
     def log(self, message):
@@ -0,0 +1,124 @@
+import ROOT
+import numpy
+
+#======================================================================
+
+class Histogram(object):
+    """One dimensional histogram with fixed bins that keeps the sums of weights and of squared weights as numpy
+    arrays. It implements the part of the TH1 interface used by the analyses (Fill, FillN, Rebin, Add, ...) and
+    follows ROOT's conventions: bin 0 is the underflow and bin nBins+1 the overflow bin, values are assigned to
+    bins as in TAxis::FindBin and under- and overflows do not enter the statistics. A ROOT.TH1D is only created
+    when the histogram is written, so histograms can be filled without any ROOT calls and merged between
+    processes by pickling them.
+    """
+    def __init__(self, name, title, nBins, low, high):
+        super(Histogram, self).__init__()
+        self.Name     = name
+        self.Title    = title
+        self.NBins    = int(nBins)
+        self.Low      = float(low)
+        self.High     = float(high)
+        self.SumW     = numpy.zeros(self.NBins + 2)
+        self.SumW2    = numpy.zeros(self.NBins + 2)
+        self.Entries  = 0
+        self.Weighted = False
+        # Sum of w, w^2, w*x, w*x^2 of the fills inside the histogram range, as fTsumw, ... of TH1
+        self.Stats    = numpy.zeros(4)
+
+    @classmethod
+    def fromTH1(cls, th1):
+        """Creates an empty Histogram with the name, title and binning of th1. The ROOT histogram is detached from
+        its directory, so it is deleted once it is no longer referenced."""
+        th1.SetDirectory(0)
+        axis = th1.GetXaxis()
+        return cls(th1.GetName(), th1.GetTitle(), axis.GetNbins(), axis.GetXmin(), axis.GetXmax())
+
+    # Filling
+    def findBins(self, values):
+        bins = numpy.full(len(values), self.NBins + 1, dtype=numpy.int64)
+        bins[values < self.Low] = 0
+        inRange = (values >= self.Low) & (values < self.High)
+        bins[inRange] = 1 + (self.NBins*(values[inRange] - self.Low)/(self.High - self.Low)).astype(numpy.int64)
+        return bins
+
+    def Fill(self, value, weight = 1.):
+        self.FillN(1, numpy.array([value], dtype=numpy.float64), numpy.array([weight], dtype=numpy.float64))
+
+    def FillN(self, n, values, weights = None):
+        """Fills the first n values with the given weights (or weight one), same signature as TH1::FillN."""
+        values  = numpy.asarray(values, dtype=numpy.float64)[:n]
+        weights = numpy.ones(n) if weights is None else numpy.asarray(weights, dtype=numpy.float64)[:n]
+        bins = self.findBins(values)
+        self.SumW  += numpy.bincount(bins, weights, minlength=self.NBins + 2)
+        self.SumW2 += numpy.bincount(bins, weights*weights, minlength=self.NBins + 2)
+        self.Entries += n
+        self.Weighted = self.Weighted or bool(numpy.any(weights != 1))
+
+        inRange = (bins > 0) & (bins <= self.NBins)
+        w, x = weights[inRange], values[inRange]
+        self.Stats += [w.sum(), (w*w).sum(), (w*x).sum(), (w*x*x).sum()]
+
+    # Operations
+    def Add(self, other, c = 1.):
+        if (other.NBins, other.Low, other.High) != (self.NBins, self.Low, self.High):
+            raise ValueError("Histogram " + self.Name + ": cannot add histograms with different binning")
+        self.SumW    += c*other.SumW
+        self.SumW2   += c*c*other.SumW2
+        self.Stats   += [c*other.Stats[0], c*c*other.Stats[1], c*other.Stats[2], c*other.Stats[3]]
+        self.Entries += other.Entries
+        self.Weighted = self.Weighted or other.Weighted or c != 1
+        return True
+
+    def Rebin(self, nGroup = 2):
+        """Merges groups of nGroup adjacent bins in place. As in TH1::Rebin, remaining bins that do not fill a
+        complete group are added to the overflow bin."""
+        nBins = self.NBins//nGroup
+        last  = nBins*nGroup
+        width = (self.High - self.Low)/self.NBins
+        merge = lambda sums: numpy.concatenate([sums[:1], sums[1:last+1].reshape(nBins, nGroup).sum(axis=1), [sums[last+1:].sum()]])
+        self.SumW  = merge(self.SumW)
+        self.SumW2 = merge(self.SumW2)
+        self.High  = self.Low + last*width
+        self.NBins = nBins
+        return self
+
+    # Access functions
+    def GetName(self):
+        return self.Name
+
+    def GetTitle(self):
+        return self.Title
+
+    def GetNbinsX(self):
+        return self.NBins
+
+    def GetEntries(self):
+        return self.Entries
+
+    def GetBinContent(self, i):
+        return self.SumW[i]
+
+    def GetBinError(self, i):
+        return numpy.sqrt(self.SumW2[i])
+
+    def Integral(self):
+        return self.SumW[1:self.NBins+1].sum()
+
+    # Conversion to ROOT
+    def toTH1D(self, name = None):
+        th1 = ROOT.TH1D(name or self.Name, self.Title, self.NBins, self.Low, self.High)
+        if self.Weighted:
+            th1.Sumw2()
+        for i in xrange(self.NBins + 2):
+            th1.SetBinContent(i, self.SumW[i])
+            if self.Weighted:
+                th1.SetBinError(i, numpy.sqrt(self.SumW2[i]))
+        th1.PutStats(numpy.array(self.Stats, dtype=numpy.float64))
+        th1.SetEntries(self.Entries)
+        return th1
+
+    def Write(self, name = None):
+        th1 = self.toTH1D(name)
+        th1.Write()
+        th1.SetDirectory(0)
+        return th1
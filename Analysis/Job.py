@@ -1,47 +1,119 @@
 import ROOT
 import glob
 import importlib
+import numpy
+import os
 import sys
 import time
+from collections import OrderedDict
 
+import AnalysisHelpers
+import BranchManifest
+import ColumnCache
+import DerivedCache
 import JobStatistics
+import DatasetCatalog
+import EventCounter
+import Preselection
+import Result
+import TupleReader
+
+# Input chains built by this process, reused by later jobs on the same files, see chainKey. Long lived processes
+# (WarmPool workers, AnalysisServer) only keep the MaxInputChains most recently used ones.
+InputChains = OrderedDict()
+MaxInputChains = 16
 
 #======================================================================
 
 class Job(object):
     """This class is a carrier class for a given analysis. It takes care of the technical details like
     file writing, setting up the input tree and providing statistics about the status of the analysis.    
+    A job may host several analyses (comma separated in the Analysis setting). They share the TupleReader and the
+    event loop, so every event is read only once, and each analysis writes its own output file to
+    <OutputDirectory>/<AnalysisName>/<processName>.root.
+    If the SkimCut setting names a cut of the analyses, the entries passing it are copied to a slimmed tree with only
+    the active branches, <SkimDirectory>/<AnalysisName>/<processName>/skim.root, which can be used as input of later runs.
+    With the WriteOutput setting off no output files are written, the results are then only available in memory (see
+    results and API.run).
+    A job may be restricted to a subset of the input files and a range of entries [first, last) of the chain built
+    from them. Such a job is one chunk of a split sample (see JobSplitter) and writes its results to
+    the chunks subdirectory of the output directory.
     """
-    def __init__(self, processName, configuration, inputLocation):
+    def __init__(self, processName, configuration, inputLocation, inputFiles = None, entryRange = None, chunkNumber = None):
         super(Job, self).__init__()
         #Configurables
         self.Name       = processName
         self.Configuration = configuration
         self.MaxEvents     = configuration["MaxEvents"]
-        self.InputFiles    = glob.glob(inputLocation)
+        self.Columnar      = configuration.get("Columnar", False)
+        self.ChunkSize     = configuration.get("ChunkSize", 10000)
+        self.UsePreselection = configuration.get("Preselection", False)
+        self.StagedReading   = configuration.get("StagedReading", True)
+        self.UseColumnCache  = configuration.get("ColumnCache", False)
+        self.SkimCut         = configuration.get("SkimCut", "")
+        self.UseDerivedCache = configuration.get("DerivedCache", False)
+        self.WriteOutput     = configuration.get("WriteOutput", True)
+        self.InputLocation = inputLocation
+        self.InputFiles    = inputFiles if inputFiles is not None else glob.glob(inputLocation)
+        self.EntryRange    = entryRange
+        self.ChunkNumber   = chunkNumber
+        self.FirstEntry    = 0
+
+        self.AnalysisNames = analysisNames(configuration)
 
         # Outputs
-        self.OutputFileLocation = configuration["OutputDirectory"] + processName
-        self.OutputFile = None
+        self.OutputFileLocations = [outputFileLocation(configuration, processName, analysisName, chunkNumber) for analysisName in self.AnalysisNames]
+        self.OutputFiles = []
+        self.SkimLocations = [skimFileLocation(configuration, processName, analysisName, chunkNumber) for analysisName in self.AnalysisNames]
 
-        # Classes - InputTree and Analysis have to be created later otherwise parallel running does not work
+        # Classes - InputTree and Analyses have to be created later otherwise parallel running does not work
         self.InputTree     = None
-        self.Analysis      = None
+        self.Catalog       = None
+        self.Store         = None
+        self.Analyses      = []
+        self.Selections    = []
+        self.PreselectionResults = {}
         self.JobStatistics = JobStatistics.JobStatistics(self.Configuration["MaxEvents"], self.Configuration["Batch"])
 
     #Setup functions
     def setupTree(self):
-      tree = ROOT.TChain("mini")
-      for filename in self.InputFiles:
-        self.log("Adding file: " + filename)
-        tree.Add(filename)
+      key = chainKey(self.Catalog.TreeName, self.InputFiles)
+      if key in InputChains:
+        tree = InputChains.pop(key)
+        # the buffers bound by the previous job may be gone
+        tree.ResetBranchAddresses()
+      else:
+        tree = ROOT.TChain(self.Catalog.TreeName)
+        for filename in self.InputFiles:
+          self.log("Adding file: " + filename)
+          tree.Add(filename)
+      InputChains[key] = tree
+      while len(InputChains) > MaxInputChains:
+        InputChains.popitem(last=False)
       return tree
                     
+    def setupStore(self):
+        store = TupleReader.TupleReader()
+        branches = None
+        if self.Columnar and self.UseColumnCache:
+            cache = ColumnCache.ColumnCache(self.Configuration.get("CacheDirectory", "cache/"), self.Catalog.TreeName)
+            store.initializeColumnCache(self.InputFiles, cache, self.ChunkSize)
+        elif self.Columnar:
+            store.initializeBatches(self.InputTree, self.ChunkSize)
+        else:
+            branches = self.activeBranches()
+            store.initializeTuple(self.InputTree, self.Catalog.getMaxima(self.InputFiles), branches)
+        if self.UseDerivedCache:
+            cache = DerivedCache.DerivedCache(self.Configuration.get("CacheDirectory", "cache/"), derivedCodeHash(self.AnalysisNames), self.Catalog.TreeName)
+            # the variables computed from the branches of a manifest are not stored, the key does not cover them
+            store.initializeDerived(self.InputFiles, [self.Catalog.getFileInfo(f)["Entries"] for f in self.InputFiles], cache, branches is None)
+        return store
+
     def createAnalysis(self, analysisName):
-        analysisName = self.Configuration["Analysis"]
         importedAnalysisModule = importlib.import_module("Analysis." + analysisName)
         analysis = getattr(importedAnalysisModule, analysisName)(self.Name)
-        analysis.Store.initializeTuple(self.InputTree)
+        analysis.Store = self.Store
+        analysis.HistManager.setBackend(self.Configuration.get("HistogramBackend", "ROOT"))
         analysis.setIsData("data" in self.Name.lower())
         return analysis
     
@@ -50,47 +122,252 @@ class Job(object):
       self.initialize()
       self.execute()
       self.finalize()
+
+    def recordBranches(self):
+      """Runs the job and returns the names of the branches the analyses read."""
+      self.initialize()
+      recorder = self.Store.startRecording()
+      self.execute()
+      self.finalize()
+      return recorder.Used
       
     def initialize(self):
       self.log("Intialization phase")
       self.JobStatistics.resetTimer()
-      self.OutputFile = ROOT.TFile.Open(self.OutputFileLocation + ".root","RECREATE")
+      # the catalog has to be up to date before the output file is opened, scanning changes the current directory
+      self.Catalog = DatasetCatalog.sharedCatalog(self.Configuration.get("CacheDirectory", "cache/"))
+      self.Catalog.update(self.InputFiles)
       self.InputTree = self.setupTree()
-      self.Analysis  = self.createAnalysis(self.Configuration["Analysis"])
+      self.Store     = self.setupStore()
+      self.Analyses  = [self.createAnalysis(analysisName) for analysisName in self.AnalysisNames]
       self.determineMaxEvents()
-      self.Analysis.doInitialization()
+      # the entry lists are evaluated on the input files, so also before the output files are opened
+      self.PreselectionResults = {}
+      self.Selections  = [self.selectEntries(analysis) for analysis in self.Analyses]
+      self.OutputFiles = [self.openOutputFile(location) if self.WriteOutput else None for location in self.OutputFileLocations]
+      # histograms are attached to the file that is the current directory when they are booked
+      for analysis, outputFile in zip(self.Analyses, self.OutputFiles):
+        if outputFile:
+          outputFile.cd()
+        analysis.doInitialization()
+        if self.SkimCut:
+          self.setupSkim(analysis)
         
     def execute(self):
       self.log("Now looping over %d events" % self.MaxEvents)
-      for n in xrange(self.MaxEvents):
-        self.JobStatistics.updateStatus(n)
-        self.InputTree.GetEntry(n)
-        self.Analysis.doAnalysis()
+      if self.Columnar:
+        self.executeBatches()
+        return
+      readEntry = self.Store.loadEntry if self.StagedReading else self.Store.getEntry
+      if self.Selections.count(None) == len(self.Selections):
+        for n in xrange(self.FirstEntry, self.FirstEntry + self.MaxEvents):
+          self.JobStatistics.updateStatus(n - self.FirstEntry)
+          readEntry(n)
+          for analysis in self.Analyses:
+            analysis.doAnalysis()
+        return
+
+      # only the entries passing the preselection of at least one analysis are read
+      entries, masks = self.preselectedEntries()
+      self.log("%d events pass the preselection" % len(entries))
+      self.JobStatistics.setMaxEvents(len(entries))
+      for i, n in enumerate(entries.tolist()):
+        self.JobStatistics.updateStatus(i)
+        readEntry(n)
+        for analysis, mask in zip(self.Analyses, masks):
+          if mask is None or mask[i]:
+            analysis.doAnalysis()
+
+    def executeBatches(self):
+      masks = [self.rangeMask(selection) for selection in self.Selections]
+      for batch in self.Store.iterateBatches(self.FirstEntry, self.FirstEntry + self.MaxEvents):
+        self.JobStatistics.updateStatus(batch.FirstEntry - self.FirstEntry)
+        first = batch.FirstEntry - self.FirstEntry
+        for analysis, mask in zip(self.Analyses, masks):
+          analysis.doBatchAnalysis(batch, None if mask is None else mask[first:first+len(batch)])
             
     def finalize(self):
-      self.JobStatistics.updateStatus(self.MaxEvents, True)
+      self.JobStatistics.updateStatus(self.JobStatistics.MaxEvents, True)
       if not self.Configuration["Batch"]:
           print ""
-      self.Analysis.doFinalization()
-      self.OutputFile.Close()
+      for analysis, outputFile, location, selection in zip(self.Analyses, self.OutputFiles, self.OutputFileLocations, self.Selections):
+        if selection is not None:
+          analysis.EventCounter.update("all", selection[2], selection[1])
+        if not outputFile:
+          analysis.doFinalization(False)
+          continue
+        outputFile.cd()
+        analysis.doFinalization()
+        outputFile.Close()
+        # chunk cutflows are dumped after merging
+        if self.ChunkNumber is None:
+          analysis.EventCounter.writeJSON(EventCounter.cutflowLocation(location + ".root"))
+      for analysis, location in zip(self.Analyses, self.SkimLocations):
+        if analysis.SkimCut:
+          self.writeSkim(analysis, location)
+      self.Store.saveDerived()
+      for key, (hits, misses) in sorted(self.Store.CacheStatistics.items()):
+        self.log("Event cache %s: %d hits, %d misses" % (key, hits, misses))
       self.log("finished successfully. Total time: %4.0fs" % self.JobStatistics.elapsedTime())
 
 
     # Helper functions
+    def openOutputFile(self, location):
+      directory = os.path.dirname(location)
+      if directory and not os.path.exists(directory):
+        try:
+          os.makedirs(directory)
+        except OSError: # created by another job in the meantime
+          pass
+      return ROOT.TFile.Open(location + ".root","RECREATE")
+
     def determineMaxEvents(self):
-      nentries = self.InputTree.GetEntries()
+      if self.EntryRange is not None:
+        self.FirstEntry = self.EntryRange[0]
+        self.MaxEvents  = self.EntryRange[1] - self.EntryRange[0]
+        self.JobStatistics.setMaxEvents(self.MaxEvents)
+        return
+
+      nentries = self.Catalog.getEntries(self.InputFiles)
       if nentries==0:
         self.log("Empty files! Abort!")
         sys.exit(1)
       
-      if self.MaxEvents > nentries:
-        self.MaxEvents = nentries
-      
-      self.MaxEvents = int(self.MaxEvents*self.Configuration["Fraction"]) 
+      self.MaxEvents = entriesToProcess(self.Configuration, nentries)
       self.JobStatistics.setMaxEvents(self.MaxEvents)
 
+    def setupSkim(self, analysis):
+      if self.SkimCut in analysis.EventCounter.CutIDs:
+        analysis.SkimCut   = self.SkimCut
+        analysis.SkimCutID = analysis.EventCounter.CutIDs[self.SkimCut]
+      else:
+        self.log("%s has no cut named %s, no skim is written" % (analysis.Name, self.SkimCut))
+
+    def writeSkim(self, analysis, location):
+      """Copies the entries that passed the skim cut of analysis to a new tree. CloneTree only copies the active
+      branches, so they are set to the ones read by the TupleReader first: in columnar mode or on a reused chain the
+      statuses left on the input tree are not those."""
+      directory = os.path.dirname(location)
+      if not os.path.exists(directory):
+        try:
+          os.makedirs(directory)
+        except OSError: # created by another job in the meantime
+          pass
+      self.InputTree.SetBranchStatus("*", 0)
+      for branchname in sorted(self.Store.ActiveBranches):
+        self.InputTree.SetBranchStatus(branchname, 1)
+      skimFile = ROOT.TFile.Open(location, "RECREATE")
+      skimTree = self.InputTree.CloneTree(0)
+      for n in analysis.SkimEntries:
+        self.InputTree.GetEntry(n)
+        skimTree.Fill()
+      skimTree.Write()
+      skimFile.Close()
+      self.log("%s: %d events passing %s written to %s" % (analysis.Name, len(analysis.SkimEntries), analysis.SkimCut, location))
+
+    def activeBranches(self):
+      """Union of the recorded branches of the analyses (see BranchManifest), None to read all branches if the
+      BranchManifest setting is off or one of the analyses has no valid manifest."""
+      if not self.Configuration.get("BranchManifest", False):
+        return None
+      manifest = BranchManifest.BranchManifest(self.Configuration.get("CacheDirectory", "cache/"))
+      branches = set()
+      for analysisName in self.AnalysisNames:
+        recorded = manifest.getBranches(analysisName)
+        if recorded is None:
+          self.log("No valid branch manifest for %s, reading all branches" % analysisName)
+          return None
+        branches.update(recorded)
+      return branches
+
+    def selectEntries(self, analysis):
+      """Returns the entries of the job passing the preselection of analysis, as well as the number and the summed
+      weight of the entries failing it, or None if the analysis has no preselection."""
+      if not self.UsePreselection:
+        analysis.Preselection = None
+      if not analysis.Preselection:
+        return None
+      # analyses with the same preselection share it
+      if analysis.Preselection in self.PreselectionResults:
+        return self.PreselectionResults[analysis.Preselection]
+      cache = Preselection.EntryListCache(self.Configuration.get("CacheDirectory", "cache/"), self.Catalog.TreeName)
+      fileEntries = [self.Catalog.getFileInfo(f)["Entries"] for f in self.InputFiles]
+      entries = cache.getChainEntries(self.InputFiles, fileEntries, analysis.Preselection)
+      entries = entries[(entries >= self.FirstEntry) & (entries < self.FirstEntry + self.MaxEvents)]
+      nFailed = self.MaxEvents - len(entries)
+      if analysis.getIsData():
+        weightFailed = float(nFailed)
+      else:
+        weightFailed = cache.getChainFailedWeight(self.InputFiles, fileEntries, analysis.Preselection, self.FirstEntry, self.MaxEvents)
+      self.log("%s: %d of %d events pass the preselection" % (analysis.Name, len(entries), self.MaxEvents))
+      self.PreselectionResults[analysis.Preselection] = entries, nFailed, weightFailed
+      return self.PreselectionResults[analysis.Preselection]
+
+    def preselectedEntries(self):
+      """Union of the entries to be read for all analyses and, per analysis, the mask of the entries it has to
+      process (None for all)."""
+      if None in self.Selections:
+        entries = numpy.arange(self.FirstEntry, self.FirstEntry + self.MaxEvents)
+      else:
+        entries = numpy.unique(numpy.concatenate([selection[0] for selection in self.Selections]))
+      masks = [None if selection is None else numpy.in1d(entries, selection[0]) for selection in self.Selections]
+      return entries, masks
+
+    def rangeMask(self, selection):
+      if selection is None: return None
+      mask = numpy.zeros(self.MaxEvents, dtype=bool)
+      mask[selection[0] - self.FirstEntry] = True
+      return mask
+
+    def results(self):
+      """Histograms and cutflow of every analysis, {analysisName: Result}. They are kept in memory, so the analyses
+      have to use the numpy HistogramBackend for the histograms to outlive the output files."""
+      return dict((analysisName, Result.Result(analysis)) for analysisName, analysis in zip(self.AnalysisNames, self.Analyses))
+
     def log(self, message):
-      print time.ctime() + " Job " + self.Name + ": " + message
+      name = self.Name if self.ChunkNumber is None else "%s.%d" % (self.Name, self.ChunkNumber)
+      print time.ctime() + " Job " + name + ": " + message
+
+#======================================================================
+
+def chainKey(treeName, filenames):
+    """Key of the chain of filenames, files that were changed in the meantime give a different key."""
+    files = []
+    for filename in filenames:
+        stat = os.stat(filename)
+        files.append((os.path.abspath(filename), stat.st_size, stat.st_mtime))
+    return treeName, tuple(files)
+
+def analysisNames(configuration):
+    return [name.strip() for name in configuration["Analysis"].split(",")]
+
+def derivedCodeHash(analysisNames):
+    """Hash of the code the derived variables may come from, the helpers, the TupleReader and the analyses, which
+    may publish their own variables through TupleReader.derived."""
+    analyses = [importlib.import_module("Analysis." + analysisName) for analysisName in sorted(analysisNames)]
+    return DerivedCache.codeHash([AnalysisHelpers, TupleReader] + analyses)
+
+def outputFileLocation(configuration, processName, analysisName, chunkNumber = None):
+    """Location of the output file (without extension). If several analyses are run together, every analysis
+    writes to its own subdirectory. The outputs of chunks are stored in a further subdirectory named chunks."""
+    directory = configuration["OutputDirectory"]
+    if len(analysisNames(configuration)) > 1:
+        directory = os.path.join(directory, analysisName)
+    if chunkNumber is None:
+        return os.path.join(directory, processName)
+    return os.path.join(directory, "chunks", "%s.%d" % (processName, chunkNumber))
+
+def skimDirectory(configuration, processName, analysisName):
+    return os.path.join(configuration.get("SkimDirectory", "skims/"), analysisName, processName)
+
+def skimFileLocation(configuration, processName, analysisName, chunkNumber = None):
+    """Location of the skim written by a job, every chunk of a sample writes its own file."""
+    filename = "skim.root" if chunkNumber is None else "skim.%d.root" % chunkNumber
+    return os.path.join(skimDirectory(configuration, processName, analysisName), filename)
+
+def entriesToProcess(configuration, nentries):
+    """Number of entries of a sample with nentries entries that are analysed according to MaxEvents and Fraction"""
+    return int(min(configuration["MaxEvents"], nentries)*configuration["Fraction"])
               
         
 
@@ -0,0 +1,68 @@
+"""Splitting of large samples into several jobs that can be processed in parallel.
+Each chunk is a Job restricted to a range of entries of the sample. The chunk boundaries are chosen such that all
+chunks of a sample contain roughly the same number of entries; a chunk may extend over several input files.
+After processing, the chunk outputs are merged into <OutputDirectory>/<processName>.root.
+"""
+
+import os
+from collections import OrderedDict
+
+import EventCounter
+import Job
+import Merger
+
+# Lower limit on the automatically determined chunk size, smaller chunks do not pay off the job setup time
+MinEntriesPerJob = 100000
+
+def splitJob(job, catalog, maxEntries):
+    """Splits job into chunks of at most maxEntries entries. Jobs that are small enough are returned unchanged."""
+    fileEntries = [catalog.getFileInfo(f)["Entries"] for f in job.InputFiles]
+    nEvents = Job.entriesToProcess(job.Configuration, sum(fileEntries))
+    nChunks = (nEvents + maxEntries - 1)//maxEntries
+    if nChunks <= 1:
+        return [job]
+
+    offsets = [0]
+    for entries in fileEntries:
+        offsets.append(offsets[-1] + entries)
+
+    chunks = []
+    for chunkNumber in range(nChunks):
+        first = chunkNumber*nEvents//nChunks
+        last  = (chunkNumber+1)*nEvents//nChunks
+        indices = [i for i in range(len(fileEntries)) if offsets[i] < last and offsets[i+1] > first]
+        base    = offsets[indices[0]]
+        files   = [job.InputFiles[i] for i in indices]
+        chunks.append(Job.Job(job.Name, job.Configuration, job.InputLocation, files, (first-base, last-base), chunkNumber))
+    return chunks
+
+def automaticChunkSize(jobs, catalog, nWorkers):
+    """Chunk size giving about four chunks per worker for the total number of entries of all jobs."""
+    nEvents = sum([Job.entriesToProcess(job.Configuration, catalog.getEntries(job.InputFiles)) for job in jobs])
+    return max(nEvents//(4*nWorkers), MinEntriesPerJob)
+
+def splitJobs(jobs, catalog, maxEntries):
+    return [chunk for job in jobs for chunk in splitJob(job, catalog, maxEntries)]
+
+def mergeChunks(jobs, mapFunction = map):
+    """Merges the outputs of all chunked jobs in jobs into the per sample output files and removes the chunk files.
+    mapFunction may be replaced by Pool.map to merge in parallel."""
+    chunksPerSample = OrderedDict()
+    for job in jobs:
+        if job.ChunkNumber is None: continue
+        chunksPerSample.setdefault(job.Name, []).append(job)
+
+    tasks = []
+    for processName, chunks in chunksPerSample.items():
+        chunks = sorted(chunks, key=lambda chunk: chunk.ChunkNumber)
+        for i, analysisName in enumerate(chunks[0].AnalysisNames):
+            inputLocations = [chunk.OutputFileLocations[i] + ".root" for chunk in chunks]
+            outputLocation = Job.outputFileLocation(chunks[0].Configuration, processName, analysisName) + ".root"
+            tasks.append((outputLocation, inputLocations, processName + "." + analysisName))
+
+    counters = Merger.treeMerge(tasks, mapFunction)
+    for outputLocation, inputLocations, name in tasks:
+        counters[outputLocation].printResults()
+        counters[outputLocation].writeJSON(EventCounter.cutflowLocation(outputLocation))
+        for location in inputLocations:
+            os.remove(location)
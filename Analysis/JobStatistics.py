@@ -21,7 +21,7 @@ class JobStatistics(object):
         return abs(time.time() - self.startTime)
         
     def updateStatus(self, n, force = False):
-        if self.IsBatch: return
+        if self.IsBatch or self.MaxEvents == 0: return
         if n % 10000 != 0 and not force: return
         fractionDone = float(n)/float(self.MaxEvents)
         if fractionDone == 0: return
@@ -0,0 +1,62 @@
+"""Relativistic kinematics on numpy arrays. Particles are given by their transverse momentum, pseudorapidity,
+azimuthal angle and energy (pt, eta, phi, e) in GeV. All functions work element wise on arrays of any shape
+(e.g. one entry per event of an EventBatch) and also accept plain numbers, so the same code serves the event
+based and the columnar analyses. The conventions follow ROOT's TLorentzVector: negative masses are returned for
+space-like four-vectors and azimuthal differences lie in [-pi, pi).
+Plain floats, as passed one object at a time by the event based analyses, are handled with the math module since
+the numpy functions are an order of magnitude slower on scalars.
+"""
+
+import math
+import numpy
+
+# Conversion between the (pt, eta, phi, e) and the cartesian (px, py, pz, e) representation
+def cartesian(pt, eta, phi, e):
+    if isinstance(phi, float):
+        return pt*math.cos(phi), pt*math.sin(phi), pt*math.sinh(eta), e
+    return pt*numpy.cos(phi), pt*numpy.sin(phi), pt*numpy.sinh(eta), e
+
+def fourMomentumSum(*particles):
+    """Cartesian components of the sum of several (pt, eta, phi, e) tuples"""
+    px, py, pz, e = 0., 0., 0., 0.
+    for particle in particles:
+        x, y, z, t = cartesian(*particle)
+        px, py, pz, e = px + x, py + y, pz + z, e + t
+    return px, py, pz, e
+
+def mass(px, py, pz, e):
+    m2 = e*e - (px*px + py*py + pz*pz)
+    if isinstance(m2, float):
+        return math.copysign(math.sqrt(abs(m2)), m2)
+    return numpy.sign(m2)*numpy.sqrt(numpy.abs(m2))
+
+def transverseMomentum(px, py):
+    if isinstance(px, float):
+        return math.sqrt(px*px + py*py)
+    return numpy.sqrt(px*px + py*py)
+
+def azimuth(px, py):
+    if isinstance(px, float):
+        return math.atan2(py, px)
+    return numpy.arctan2(py, px)
+
+# Observables of particle pairs
+def invariantMass(*particles):
+    """Invariant mass of the system of the given (pt, eta, phi, e) tuples"""
+    return mass(*fourMomentumSum(*particles))
+
+def deltaPhi(phi1, phi2):
+    if isinstance(phi1, float):
+        return (phi1 - phi2 + math.pi) % (2*math.pi) - math.pi
+    return numpy.mod(phi1 - phi2 + numpy.pi, 2*numpy.pi) - numpy.pi
+
+def deltaR(eta1, phi1, eta2, phi2):
+    if isinstance(eta1, float):
+        return math.sqrt((eta1 - eta2)**2 + deltaPhi(phi1, phi2)**2)
+    return numpy.sqrt((eta1 - eta2)**2 + deltaPhi(phi1, phi2)**2)
+
+def transverseMass(pt1, phi1, pt2, phi2):
+    """Transverse mass of two (massless) objects, e.g. a lepton and the missing transverse momentum"""
+    if isinstance(phi1, float):
+        return math.sqrt(2*pt1*pt2*(1 - math.cos(phi1 - phi2)))
+    return numpy.sqrt(2*pt1*pt2*(1 - numpy.cos(phi1 - phi2)))
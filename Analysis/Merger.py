@@ -0,0 +1,113 @@
+"""Merging of the output files written by several jobs, similar to hadd.
+Histograms are merged key by key: for every key only the running sum and the object currently read are kept in
+memory. The cutflows written by the EventCounter are merged by cut name.
+Many files are merged as a tree reduction: the inputs are merged in groups of FanIn files, the results of one level
+are the inputs of the next level, and all groups of a level can be processed in parallel.
+"""
+
+import ROOT
+import os
+import time
+
+import EventCounter
+
+# Number of files merged in one step of the tree reduction
+FanIn = 8
+
+#======================================================================
+
+def mergeFiles(outputLocation, inputLocations, name = "Merger"):
+    """Merges the inputLocations into outputLocation. Returns the merged EventCounter."""
+    addDirectory = ROOT.TH1.AddDirectoryStatus()
+    ROOT.TH1.AddDirectory(False)
+
+    inputFiles = [ROOT.TFile.Open(location, "READ") for location in inputLocations]
+    outputFile = ROOT.TFile.Open(outputLocation, "RECREATE")
+
+    cutflowNames = [EventCounter.RawCutflowName, EventCounter.WeightedCutflowName]
+    keyNames = []
+    for inputFile in inputFiles:
+        for key in inputFile.GetListOfKeys():
+            if key.GetName() not in keyNames + cutflowNames:
+                keyNames.append(key.GetName())
+
+    for keyName in keyNames:
+        merged = None
+        for inputFile in inputFiles:
+            histogram = readObject(inputFile, keyName)
+            if histogram is None: continue
+            if merged is None:
+                merged = histogram
+            else:
+                merged.Add(histogram)
+        outputFile.cd()
+        merged.Write(keyName)
+
+    counter = EventCounter.EventCounter(name)
+    for inputFile in inputFiles:
+        counter.readResults(inputFile)
+    outputFile.cd()
+    counter.writeResults()
+
+    outputFile.Close()
+    for inputFile in inputFiles:
+        inputFile.Close()
+    ROOT.TH1.AddDirectory(addDirectory)
+    return counter
+
+def readObject(rootFile, keyName):
+    """Reads the object stored under keyName such that it is owned by python and deleted as soon as it is
+    no longer referenced."""
+    key = rootFile.GetKey(keyName)
+    if not key: return None
+    obj = key.ReadObj()
+    ROOT.SetOwnership(obj, True)
+    return obj
+
+def mergeGroup(arguments):
+    """Pool.map compatible wrapper of mergeFiles, takes a (outputLocation, inputLocations, name) tuple."""
+    return mergeFiles(*arguments)
+
+def intermediateLocation(outputLocation, level, index):
+    base, extension = os.path.splitext(outputLocation)
+    return "%s.merge%d_%d%s" % (base, level, index, extension)
+
+def treeMerge(tasks, mapFunction = map, fanIn = FanIn):
+    """Merges several files per output. tasks is a list of (outputLocation, inputLocations, name) tuples.
+    In every level of the reduction the groups of all tasks are handed to mapFunction together, so Pool.map can be
+    used to merge them in parallel. Intermediate files are removed as soon as they have been merged.
+    Returns a dictionary of the merged EventCounter per outputLocation.
+    """
+    pending  = [(outputLocation, list(inputLocations), name) for outputLocation, inputLocations, name in tasks]
+    counters = {}
+    level    = 0
+    intermediates = set()
+    while pending:
+        groups = []
+        remaining = []
+        for outputLocation, inputLocations, name in pending:
+            if len(inputLocations) <= fanIn:
+                groups.append((outputLocation, inputLocations, name))
+                continue
+            nextInputs = []
+            for index, first in enumerate(range(0, len(inputLocations), fanIn)):
+                location = intermediateLocation(outputLocation, level, index)
+                groups.append((location, inputLocations[first:first+fanIn], name))
+                nextInputs.append(location)
+            remaining.append((outputLocation, nextInputs, name))
+
+        log("merge level %d: %d groups" % (level, len(groups)))
+        for (outputLocation, inputLocations, name), counter in zip(groups, mapFunction(mergeGroup, groups)):
+            counters[outputLocation] = counter
+            for location in inputLocations:
+                if location in intermediates:
+                    os.remove(location)
+                    intermediates.remove(location)
+        intermediates.update([location for outputLocation, nextInputs, name in remaining for location in nextInputs])
+        pending = remaining
+        level  += 1
+
+    return dict([(outputLocation, counters[outputLocation]) for outputLocation, inputLocations, name in tasks])
+
+def log(message):
+    print time.ctime() + " Merger: " + message
@@ -0,0 +1,112 @@
+"""Preselection of the entries of the input files with expressions over the raw branches.
+Analyses may declare a preselection (see Analysis.Preselection), an expression in TTree::Draw syntax such as
+"(trigE || trigM) && passGRL && hasGoodVertex". The expression is evaluated natively by TTree::Draw for every input
+file and only the entries passing it are read and handed to the analysis. Entries failing it are only added to the
+"all" count of the cutflow, so the preselection has to be the first cut of the analysis, the standard event cuts;
+with a tighter one the rows between "all" and the cut implying it would miss the failing entries.
+The entry lists are cached in <CacheDirectory>/entrylists/ as numpy files, keyed by the file (path, size and
+modification time) and the expression, together with the summed weights of the failing entries per entry range.
+"""
+
+import ROOT
+import hashlib
+import numpy
+import os
+
+import EventBatch
+
+# Expression of the weight of an event (EventInfo.scalefactor()*EventInfo.eventWeight())
+WeightExpression = "(scaleFactor_ELE*scaleFactor_MUON*scaleFactor_TRIGGER)*(mcWeight*scaleFactor_PILEUP*scaleFactor_ZVERTEX)"
+
+# Number of entries evaluated per TTree::Draw call when summing weights
+DrawWindow = 1000000
+
+#======================================================================
+
+class EntryListCache(object):
+    """Disk cache of the entries of single input files that pass a preselection expression and of the summed weight
+    of the entries failing it."""
+    def __init__(self, cacheDirectory, treeName = "mini"):
+        super(EntryListCache, self).__init__()
+        self.Directory = os.path.join(cacheDirectory, "entrylists")
+        self.TreeName  = treeName
+
+    def location(self, path, expression):
+        stat = os.stat(path)
+        key  = "%s:%d:%r:%s:%s" % (os.path.abspath(path), stat.st_size, stat.st_mtime, self.TreeName, expression)
+        return os.path.join(self.Directory, hashlib.sha1(key).hexdigest() + ".npy")
+
+    def save(self, location, values):
+        if not os.path.exists(self.Directory):
+            try:
+                os.makedirs(self.Directory)
+            except OSError: # created by another job in the meantime
+                pass
+        temporaryLocation = "%s.%d.tmp.npy" % (location[:-4], os.getpid())
+        numpy.save(temporaryLocation, values)
+        os.rename(temporaryLocation, location)
+
+    def getEntries(self, path, expression):
+        """Local entry numbers of the file path passing expression."""
+        location = self.location(path, expression)
+        if os.path.exists(location):
+            return numpy.load(location)
+        entries = selectEntries(path, self.TreeName, expression)
+        self.save(location, entries)
+        return entries
+
+    def getFailedWeight(self, path, expression, firstEntry, nEntries):
+        """Summed weight of the local entries [firstEntry, firstEntry+nEntries) of the file path failing expression."""
+        location = self.location(path, "%s:%d:%d:failed weight" % (expression, firstEntry, nEntries))
+        if os.path.exists(location):
+            return float(numpy.load(location))
+        rootFile = ROOT.TFile.Open(path, "READ")
+        tree = rootFile.Get(self.TreeName)
+        weight = sumOfWeights(tree, "!(%s)" % expression, firstEntry, nEntries) if tree else 0.
+        rootFile.Close()
+        self.save(location, numpy.array(weight))
+        return weight
+
+    def getChainEntries(self, filenames, fileEntries, expression):
+        """Entry numbers of the chain built from filenames (with fileEntries entries each) passing expression."""
+        offsets = numpy.cumsum([0] + list(fileEntries))
+        return numpy.concatenate([self.getEntries(f, expression) + offset for f, offset in zip(filenames, offsets)] +
+                                 [numpy.zeros(0, dtype=numpy.int64)])
+
+    def getChainFailedWeight(self, filenames, fileEntries, expression, firstEntry, nEntries):
+        """Summed weight of the entries [firstEntry, firstEntry+nEntries) of the chain built from filenames failing
+        expression, from the cached sums of the parts of the files in the range."""
+        total  = 0.
+        offset = 0
+        for filename, n in zip(filenames, fileEntries):
+            first = max(firstEntry, offset)
+            last  = min(firstEntry + nEntries, offset + n)
+            if last > first:
+                total += self.getFailedWeight(filename, expression, first - offset, last - first)
+            offset += n
+        return total
+
+#======================================================================
+
+def selectEntries(path, treeName, expression):
+    rootFile = ROOT.TFile.Open(path, "READ")
+    tree = rootFile.Get(treeName)
+    entries = numpy.zeros(0, dtype=numpy.int64)
+    if tree and tree.GetEntries() > 0:
+        tree.SetEstimate(tree.GetEntries() + 1)
+        nSelected = tree.Draw("Entry$", expression, "goff")
+        # expressions over object branches may select an entry several times
+        entries = numpy.unique(EventBatch.toNumpy(tree.GetV1(), nSelected).astype(numpy.int64))
+    rootFile.Close()
+    return entries
+
+def sumOfWeights(tree, selection, firstEntry, nEntries):
+    """Sum of the event weights of the entries [firstEntry, firstEntry+nEntries) of tree passing selection."""
+    total = 0.
+    for first in xrange(firstEntry, firstEntry + nEntries, DrawWindow):
+        n = min(DrawWindow, firstEntry + nEntries - first)
+        tree.SetEstimate(n + 1)
+        nSelected = tree.Draw(WeightExpression, selection, "goff", n, first)
+        if nSelected > 0:
+            total += EventBatch.toNumpy(tree.GetV1(), nSelected).sum()
+    return total
@@ -0,0 +1,27 @@
+"""In memory results of an analysis on a sample, see Job.results and API.run."""
+
+#======================================================================
+
+class Result(object):
+    """Histograms ({histName: Histogram}) and EventCounter of an analysis. With the numpy HistogramBackend they are
+    plain numpy objects, so results can be pickled, e.g. to return them from the workers of a Pool."""
+    def __init__(self, analysis):
+        super(Result, self).__init__()
+        self.Histograms   = dict((histName, histogram.Histogram) for histName, histogram in analysis.HistManager.Histograms.items())
+        self.EventCounter = analysis.EventCounter
+
+    def add(self, other):
+        """Adds the result of another chunk of the same sample."""
+        for histName, histogram in other.Histograms.items():
+            if histName in self.Histograms:
+                self.Histograms[histName].Add(histogram)
+            else:
+                self.Histograms[histName] = histogram
+        self.EventCounter.add(other.EventCounter)
+
+    def getHistogram(self, histName):
+        return self.Histograms.get(histName)
+
+    def cutflow(self):
+        """List of (cut, events, weighted events) in the order of the cuts."""
+        return self.EventCounter.results()
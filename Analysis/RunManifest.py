@@ -0,0 +1,102 @@
+import hashlib
+import importlib
+import json
+import os
+import sys
+import types
+
+#======================================================================
+
+# Job settings that influence the content of the output files
+ConfigurationKeys = ["Analysis", "Fraction", "MaxEvents", "Preselection", "SkimCut"]
+
+class RunManifest(object):
+    """Bookkeeping of the samples processed into an output directory. For every sample the fingerprint of the
+    run that produced its output file is stored in <OutputDirectory>/manifest.json: size and modification time of
+    the input files, a hash of the source code of the analysis and of all modules of the Analysis package it uses,
+    and the relevant settings of the job configuration. A sample whose fingerprint did not change since its
+    output was written is up to date and does not need to be processed again.
+    """
+    def __init__(self, configuration):
+        super(RunManifest, self).__init__()
+        self.Location   = os.path.join(configuration["OutputDirectory"], "manifest.json")
+        self.Records      = self.read()
+        self.CodeHashes   = {}
+        self.Fingerprints = {}
+
+    # Persistency
+    def read(self):
+        if not os.path.exists(self.Location):
+            return {}
+        try:
+            with open(self.Location) as manifestFile:
+                return json.load(manifestFile)
+        except ValueError:
+            return {}
+
+    def save(self):
+        records = self.read()
+        records.update(self.Records)
+        temporaryLocation = "%s.%d.tmp" % (self.Location, os.getpid())
+        with open(temporaryLocation, "w") as manifestFile:
+            json.dump(records, manifestFile, indent=1, sort_keys=True)
+        os.rename(temporaryLocation, self.Location)
+
+    # Fingerprints
+    def codeHash(self, analysisNames):
+        for analysisName in analysisNames:
+            if analysisName not in self.CodeHashes:
+                self.CodeHashes[analysisName] = hashModules(importlib.import_module("Analysis." + analysisName))
+        return ",".join([self.CodeHashes[analysisName] for analysisName in analysisNames])
+
+    def fingerprint(self, job):
+        """The fingerprint is taken once per sample, before it is processed, so that changes of the inputs
+        during the run are noticed by the next run."""
+        if job.Name not in self.Fingerprints:
+            inputs = dict([(os.path.abspath(f), [os.stat(f).st_size, os.stat(f).st_mtime]) for f in job.InputFiles])
+            self.Fingerprints[job.Name] = {
+                "Inputs"        : inputs,
+                "CodeHash"      : self.codeHash(job.AnalysisNames),
+                "Configuration" : dict([(key, job.Configuration.get(key)) for key in ConfigurationKeys]),
+            }
+        return self.Fingerprints[job.Name]
+
+    def isUpToDate(self, job):
+        for location in job.OutputFileLocations:
+            if not os.path.exists(location + ".root"): return False
+        return self.Records.get(job.Name) == self.fingerprint(job)
+
+    def record(self, job):
+        self.Records[job.Name] = self.fingerprint(job)
+
+#======================================================================
+
+def dependencies(module, found = None):
+    """All modules of the Analysis package that module uses directly or indirectly, including module itself.
+    Functions and classes imported with "from X import y" are followed back to the module defining them."""
+    found = found if found is not None else {}
+    found[module.__name__] = module
+    packageDirectory = os.path.dirname(os.path.abspath(__file__))
+    for value in vars(module).values():
+        if isinstance(value, (types.FunctionType, types.ClassType, type)):
+            value = sys.modules.get(value.__module__)
+        if not type(value) is type(module) or value.__name__ in found or not hasattr(value, "__file__"): continue
+        if os.path.dirname(os.path.abspath(value.__file__)) != packageDirectory: continue
+        dependencies(value, found)
+    return found
+
+# Hashes computed by this process, the loaded code does not change while it runs
+ModuleHashes = {}
+
+def hashModules(module):
+    """Hash of the source code of module and of all Analysis modules it depends on."""
+    if module.__name__ in ModuleHashes:
+        return ModuleHashes[module.__name__]
+    digest = hashlib.sha1()
+    for name, dependency in sorted(dependencies(module).items()):
+        sourceFile = os.path.splitext(dependency.__file__)[0] + ".py"
+        digest.update(name)
+        with open(sourceFile, "rb") as source:
+            digest.update(source.read())
+    ModuleHashes[module.__name__] = digest.hexdigest()
+    return ModuleHashes[module.__name__]
@@ -0,0 +1,160 @@
+"""Long running analysis server for interactive work, see AnalysisServer.py.
+The server listens on a Unix socket and runs the jobs of each request one after the other in the server process, one
+request at a time. It keeps what the jobs load between the requests: ROOT, the input chains (Job.InputChains), the
+dataset catalog and the code hashes. Before running a request the modules of the Analysis package whose source
+changed since they were loaded are reloaded, so edited cuts are picked up without a restart. Reloading a module
+runs its code again, which resets its state: the input chains are carried over to the reloaded Job module (see
+PersistentState), the dataset catalogs are read again from the cache directory after DatasetCatalog was edited.
+Requests and responses are single lines of JSON.
+"""
+
+import SocketServer
+import imp
+import importlib
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+
+import Job
+import RunManifest
+
+# Modification times of the sources of the loaded Analysis modules at the time they were (re)loaded
+SourceTimes = {}
+
+# Module attributes that are restored after the module was reloaded, they hold no code of the module
+PersistentState = {"Analysis.Job": ["InputChains"]}
+
+#======================================================================
+
+class AnalysisServer(SocketServer.UnixStreamServer):
+    """Runs the requests received on the socket at location until it is asked to stop."""
+    def __init__(self, location):
+        if os.path.exists(location):
+            os.remove(location)
+        SocketServer.UnixStreamServer.__init__(self, location, RequestHandler)
+        self.Location = location
+        self.Running  = True
+        recordSourceTimes()
+
+    def serve(self):
+        self.log("Listening on %s" % self.Location)
+        try:
+            while self.Running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            os.remove(self.Location)
+
+    def process(self, request):
+        """Runs request, a dictionary with the location of the Configuration and optionally Analysis, Samples,
+        OutputDirectory and Reload, and returns the output file and the cutflow per analysis and sample."""
+        if request.get("Command") == "stop":
+            self.Running = False
+            return {"Stopped": True}
+        start = time.time()
+        configuration = imp.load_source("ServerConfiguration", request["Configuration"])
+        jobConfiguration = dict(configuration.Job, Batch=True)
+        if request.get("Analysis"):
+            jobConfiguration["Analysis"] = request["Analysis"]
+        if request.get("OutputDirectory"):
+            jobConfiguration["OutputDirectory"] = request["OutputDirectory"]
+        reloaded = reloadModules(Job.analysisNames(jobConfiguration)) if request.get("Reload", True) else []
+
+        results = {}
+        for processName, fileLocation in sorted(selectProcesses(configuration.Processes, request.get("Samples", "")).items()):
+            job = Job.Job(processName, jobConfiguration, fileLocation)
+            job.run()
+            for analysisName, analysis, location in zip(job.AnalysisNames, job.Analyses, job.OutputFileLocations):
+                cutflow = [{"Cut": cut, "Events": raw, "Weighted": weighted} for cut, raw, weighted in analysis.EventCounter.results()]
+                results.setdefault(analysisName, {})[processName] = {"Output": location + ".root", "Cutflow": cutflow}
+        self.log("Request for %s done in %.1fs" % (jobConfiguration["Analysis"], time.time() - start))
+        return {"Results": results, "Reloaded": reloaded, "Time": time.time() - start}
+
+    def log(self, message):
+        print time.ctime() + " AnalysisServer: " + message
+
+class RequestHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        try:
+            response = self.server.process(json.loads(self.rfile.readline()))
+        except (Exception, SystemExit):
+            # the server keeps running, e.g. after a syntax error in an edited analysis
+            response = {"Error": traceback.format_exc()}
+            self.server.log(response["Error"])
+        self.wfile.write(json.dumps(response) + "\n")
+
+#======================================================================
+
+def submit(location, request):
+    """Sends request to the server listening at location and returns its response."""
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(location)
+    try:
+        connection.sendall(json.dumps(request) + "\n")
+        return json.loads(connection.makefile().readline())
+    finally:
+        connection.close()
+
+def selectProcesses(processes, samples):
+    if samples == "":
+        return processes
+    names = [name.strip() for name in samples.split(",")]
+    unknown = [name for name in names if name not in processes]
+    if unknown:
+        raise KeyError("Unknown samples: " + ", ".join(unknown))
+    return dict((name, processes[name]) for name in names)
+
+#======================================================================
+
+def sourceTime(module):
+    return os.path.getmtime(os.path.splitext(module.__file__)[0] + ".py")
+
+def packageModules(module):
+    """Modules of the Analysis package that module uses directly."""
+    packageDirectory = os.path.dirname(os.path.abspath(__file__))
+    return [value for value in vars(module).values() if type(value) is type(module) and hasattr(value, "__file__")
+            and os.path.dirname(os.path.abspath(value.__file__)) == packageDirectory]
+
+def recordSourceTimes():
+    for name, module in sys.modules.items():
+        if name.startswith("Analysis.") and module is not None and hasattr(module, "__file__") and name not in SourceTimes:
+            SourceTimes[name] = sourceTime(module)
+
+def reloadModules(analysisNames):
+    """Reloads the modules used by Job and the analyses whose source changed, dependencies first. The analyses are
+    also reloaded if one of the modules they use was, so they derive e.g. from the reloaded Analysis class. Modules
+    that did not change are not reloaded and keep their state. Returns the reloaded modules."""
+    analyses = [importlib.import_module("Analysis." + analysisName) for analysisName in analysisNames]
+    recordSourceTimes()
+    changed  = set([name for name, mtime in SourceTimes.items() if sourceTime(sys.modules[name]) != mtime])
+    reloaded = []
+    visited  = set()
+    for module in [Job] + analyses:
+        reloadModule(module, changed, visited, reloaded)
+    for module in analyses:
+        if module.__name__ not in reloaded and set(RunManifest.dependencies(module)) & set(reloaded):
+            reloadSource(module, reloaded)
+    if reloaded:
+        RunManifest.ModuleHashes.clear()
+    recordSourceTimes()
+    return reloaded
+
+def reloadModule(module, changed, visited, reloaded):
+    if module.__name__ in visited: return
+    visited.add(module.__name__)
+    for dependency in packageModules(module):
+        reloadModule(dependency, changed, visited, reloaded)
+    if module.__name__ in changed:
+        reloadSource(module, reloaded)
+
+def reloadSource(module, reloaded):
+    mtime = sourceTime(module)
+    state = dict((name, getattr(module, name)) for name in PersistentState.get(module.__name__, []))
+    reload(module)
+    for name, value in state.items():
+        setattr(module, name, value)
+    SourceTimes[module.__name__] = mtime
+    reloaded.append(module.__name__)
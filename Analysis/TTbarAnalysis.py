@@ -10,8 +10,11 @@ class TTbarAnalysis(Analysis.Analysis):
   """
   def __init__(self, store):
     super(TTbarAnalysis, self).__init__(store)
+    self.Preselection = AH.StandardEventCutsExpression
   
   def initialize(self):
+      self.cut_EventCuts, self.cut_MET, self.cut_1_Lepton, self.cut_Jets, self.cut_btags = self.addCuts(["EventCuts", "MET", "1 Lepton", "Jets", "btags"])
+
       self.hist_WtMass      =  self.addStandardHistogram("WtMass")
 
       self.hist_leptn       =  self.addStandardHistogram("lep_n")
@@ -41,44 +44,41 @@ class TTbarAnalysis(Analysis.Analysis):
   def analyze(self):
       # retrieving objects
       eventinfo = self.Store.getEventInfo()
-      weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
-      self.countEvent("all", weight)
+      weight = self.Store.getEventWeight() if not self.getIsData() else 1
 
       # apply standard event based selection
       if not AH.StandardEventCuts(eventinfo): return False
-      self.countEvent("EventCuts", weight)
+      self.countEvent(self.cut_EventCuts, weight)
 
       # neutrinos are expected, so cut on missing transverse momentum
       etmiss = self.Store.getEtMiss()
       if not (etmiss.et() > 30.0): return False
-      self.countEvent("MET", weight)
+      self.countEvent(self.cut_MET, weight)
       
       # one good lepton from one of the W boson decays is expected, so require exactly one good lepton
-      goodLeptons = AH.selectAndSortContainer(self.Store.getLeptons(), AH.isGoodLepton, lambda p: p.pt())
+      goodLeptons = AH.goodLeptons(self.Store)
       if not (len(goodLeptons) == 1): return False
-      self.countEvent("1 Lepton", weight)
+      self.countEvent(self.cut_1_Lepton, weight)
 
       leadlepton = goodLeptons[0]
       
       # two jets from one of the W boson decays as well as two b-jets from the top pair decays are expected
-      goodJets = AH.selectAndSortContainer(self.Store.getJets(), AH.isGoodJet, lambda p: p.pt())
-      if not len(goodJets) >= 4: return False
-      self.countEvent("Jets", weight)
+      if not AH.nGoodJets(self.Store) >= 4: return False
+      self.countEvent(self.cut_Jets, weight)
 
       # apply the b-tagging requirement using the MV1 algorithm at 80% efficiency
-      btags = sum([1 for jet in goodJets if jet.mv1() > 0.7892])
-      if not (btags >= 2): return False
-      self.countEvent("btags", weight)
+      if not (AH.nBTags(self.Store) >= 2): return False
+      self.countEvent(self.cut_btags, weight)
 
       # apply a cut on the transverse mass of the W boson decaying to leptons
-      if not (AH.WTransverseMass(leadlepton, etmiss) > 30.0): return False
+      if not (AH.leadingLeptonWTransverseMass(self.Store) > 30.0): return False
 
       # Histograms detailing event information
       self.hist_vxp_z.Fill(eventinfo.primaryVertexPosition(), weight)
       self.hist_pvxp_n.Fill(eventinfo.numberOfVertices(), weight)
 
       # histograms for the W boson properties
-      self.hist_WtMass.Fill(AH.WTransverseMass(leadlepton, etmiss), weight)
+      self.hist_WtMass.Fill(AH.leadingLeptonWTransverseMass(self.Store), weight)
 
       # histograms for missing et
       self.hist_etmiss.Fill(etmiss.et(),weight)  
@@ -97,6 +97,7 @@ class TTbarAnalysis(Analysis.Analysis):
       self.hist_leptetc.Fill(leadlepton.isoetconerel20(), weight)
       
       # histograms detailing jet information
+      goodJets = AH.goodJets(self.Store)
       self.hist_njets.Fill(len(goodJets), weight)
       [self.hist_jetm.Fill(jet.m(), weight) for jet in goodJets]
       [self.hist_jetspt.Fill(jet.pt(), weight) for jet in goodJets]
@@ -1,114 +1,429 @@
 import ROOT
+import bisect
+import numpy
 from array import array
 
+import EventBatch as EB
+
+# Hard limit on the number of leptons and jets per event that are read
+MaxObjects = 20
+
+# The branches that are read from the tuples: (datamember of the TupleReader, branch name, array type)
+EventBranches = [
+    ("eventNumber",   "eventNumber",          "i"),
+    ("runNumber",     "runNumber",            "i"),
+    ("mcWeight",      "mcWeight",             "f"),
+
+    ("passGRL",       "passGRL",              "b"),
+    ("hasGoodVertex", "hasGoodVertex",        "b"),
+    ("trigE",         "trigE",                "b"),
+    ("trigM",         "trigM",                "b"),
+
+    ("SF_Pileup",     "scaleFactor_PILEUP",   "f"),
+    ("SF_Ele",        "scaleFactor_ELE",      "f"),
+    ("SF_Mu",         "scaleFactor_MUON",     "f"),
+    ("SF_BTag",       "scaleFactor_BTAG",     "f"),
+    ("SF_Trigger",    "scaleFactor_TRIGGER",  "f"),
+    ("SF_JVF",        "scaleFactor_JVFSF",    "f"),
+    ("SF_ZVertex",    "scaleFactor_ZVERTEX",  "f"),
+    ("vxp_z",         "vxp_z",                "f"),
+    ("pvxp_n",        "pvxp_n",               "i"),
+
+    ("Lep_n",         "lep_n",                "i"),
+    ("Jet_n",         "alljet_n",             "i"),
+
+    ("Met_et",        "met_et",               "f"),
+    ("Met_phi",       "met_phi",              "f"),
+]
+
+LeptonBranches = [
+    ("Lep_pt",        "lep_pt",                   "f"),
+    ("Lep_eta",       "lep_eta",                  "f"),
+    ("Lep_phi",       "lep_phi",                  "f"),
+    ("Lep_e",         "lep_E",                    "f"),
+    ("Lep_pdgid",     "lep_type",                 "i"),
+    ("Lep_charge",    "lep_charge",               "f"),
+    ("Lep_ptcone30",  "lep_ptcone30",             "f"),
+    ("Lep_etcone20",  "lep_etcone20",             "f"),
+    ("Lep_d0",        "lep_trackd0pvunbiased",    "f"),
+    ("Lep_d0Sig",     "lep_tracksigd0pvunbiased", "f"),
+    ("Lep_trigMatch", "lep_trigMatched",          "b"),
+    ("Lep_z0",        "lep_z0",                   "f"),
+    ("Lep_flag",      "lep_flag",                 "i"),
+]
+
+JetBranches = [
+    ("Jet_pt",        "jet_pt",       "f"),
+    ("Jet_eta",       "jet_eta",      "f"),
+    ("Jet_e",         "jet_E",        "f"),
+    ("Jet_phi",       "jet_phi",      "f"),
+    ("Jet_mass",      "jet_m",        "f"),
+    ("Jet_jvf",       "jet_jvf",      "f"),
+    ("Jet_mv1",       "jet_MV1",      "f"),
+]
+
+# Momenta and energies converted to GeV once per event, (datamember of the TupleReader, datamember holding the value in MeV)
+GeVAttributes = [
+    ("Met_etGeV",     "Met_et"),
+    ("Lep_ptGeV",     "Lep_pt"),
+    ("Lep_eGeV",      "Lep_e"),
+    ("Jet_ptGeV",     "Jet_pt"),
+    ("Jet_eGeV",      "Jet_e"),
+]
+
+# Attributes of the TupleReader by which the object views access the branches
+BranchAttributes = dict((attribute, branchname) for attribute, branchname, vartype in EventBranches + LeptonBranches + JetBranches)
+BranchAttributes.update((attribute, BranchAttributes[source]) for attribute, source in GeVAttributes)
+
+# Object counters, these are always read as the object collections depend on them
+CounterBranches = ["lep_n", "alljet_n"]
+
+# Branches that are only read when the corresponding accessor is used in the staged read mode (see loadEntry),
+# all other event branches are read for every entry
+StagedBranches = {
+    "Leptons" : [branchname for attribute, branchname, vartype in LeptonBranches],
+    "Jets"    : [branchname for attribute, branchname, vartype in JetBranches],
+    "EtMiss"  : ["met_phi"],
+}
+
+#======================================================================
+
+def batchBranches():
+    """The event level branches and the (counter branch, branches) collections read in columnar mode."""
+    eventBranches = [(branchname, vartype) for attribute, branchname, vartype in EventBranches]
+    collections   = [("lep_n",    [(branchname, vartype) for attribute, branchname, vartype in LeptonBranches]),
+                     ("alljet_n", [(branchname, vartype) for attribute, branchname, vartype in JetBranches])]
+    return eventBranches, collections
+
 #======================================================================
 
 class TupleReader(object):
     """ This class implements the rules that govern the readout of the ROOT tuples and and provide a caching facility.
     Caching improves the readout by eliminating the need for branch address lookup each time the variable is accessed.
+    Alternatively the tuples can be read in columnar mode, where chunks of entries are read into numpy arrays
+    (see EventBatch) and handed to the analysis as a whole. The batches are then read from the tree or from the
+    memory mapped columns of the ColumnCache.
+    In the staged read mode the entries are read with loadEntry instead of TTree::GetEntry. Only the event level
+    branches are read for every entry, the lepton, jet and missing transverse momentum branches are read the first
+    time getLeptons, getJets or getEtMiss is called for the entry, so events rejected by the event cuts are cheap.
+    Quantities derived from the event (weight, selected objects, masses, ...) can be stored in the event cache
+    (see cached), which is cleared whenever a new entry is loaded. They are then computed once per event and shared
+    by all analyses of a job. The collection accessors use it to convert the momenta and energies to GeV once per
+    event (see GeVAttributes). Numeric derived variables (see derived) can also be kept across runs in the
+    DerivedCache, in which case they are read instead of being computed.
     """
 
     def __init__(self):
         super(TupleReader, self).__init__()
         self.Tree = None
+        self.Batch = None
+        self.CurrentEntry = -1
+        self.CachedFiles = None
+        self.Maxima = {}
+        self.ActiveBranches = set(BranchAttributes.values())
+        self.Recorder = None
+        self.Cache = {}
+        self.CacheStatistics = {}
+        self.DerivedCache = None
+        self.LocalEntry = -1
+        self.TreeNumber = -1
+        self.Pending    = set()
         
-    def initializeTuple(self,tree):
+    def initializeTuple(self,tree, maxima = None, branches = None):
         """The initial setup of the caching is done here. Branches in the TTree may be deactivated using SetBranchStatus to
         increase readout speed. Only necessary branches are activated and their contents are bound to datamembers of the
-        tuple reader.
+        tuple reader. The maxima of the object counters may be passed in (see DatasetCatalog) to avoid scanning the tree.
+        If branches is given (see BranchManifest), only these branches and the object counters are activated, the
+        datamembers of all other branches are MissingBranches, so reading them fails instead of returning zero.
         """
         self.Tree = tree
+        if branches is not None:
+            self.ActiveBranches = set(branches) | set(CounterBranches)
+        self.Maxima = maxima if maxima is not None else {}
         self.Tree.SetBranchStatus("*",0)
         
-        #EventInfo 
-        self.eventNumber      = self.activate("i", "eventNumber",            1)
-        self.runNumber        = self.activate("i", "runNumber" ,             1)
-        self.mcWeight         = self.activate("f", "mcWeight",               1)
-                                                                             
-        self.passGRL          = self.activate("b", "passGRL" ,               1)
-        self.hasGoodVertex    = self.activate("b", "hasGoodVertex",          1)
-        self.trigE            = self.activate("b", "trigE",                  1)
-        self.trigM            = self.activate("b", "trigM",                  1)
-                                                                             
-        self.SF_Pileup        = self.activate("f", "scaleFactor_PILEUP",     1)
-        self.SF_Ele           = self.activate("f", "scaleFactor_ELE",        1)
-        self.SF_Mu            = self.activate("f", "scaleFactor_MUON",       1)
-        self.SF_BTag          = self.activate("f", "scaleFactor_BTAG",       1)
-        self.SF_Trigger       = self.activate("f", "scaleFactor_TRIGGER",    1)
-        self.SF_JVF           = self.activate("f", "scaleFactor_JVFSF",      1)
-        self.SF_ZVertex       = self.activate("f", "scaleFactor_ZVERTEX",    1)
-        self.vxp_z            = self.activate("f", "vxp_z",                  1)
-        self.pvxp_n           = self.activate("i", "pvxp_n",                 1)
-
-        self.EventInfo = EventInfo(self)
-        
+        #EventInfo, EtMiss and the object counters
+        for attribute, branchname, vartype in EventBranches:
+            setattr(self, attribute, self.activate(vartype, branchname, 1))
 
         #LeptonInfo
         max_Lep = self.GetMaximum("lep_n")
-        max_Lep = min(abs(max_Lep), 20)
-        self.Lep_n         = self.activate("i", "lep_n",                    1)
-        self.Lep_pt        = self.activate("f", "lep_pt",                   max_Lep) 
-        self.Lep_eta       = self.activate("f", "lep_eta",                  max_Lep) 
-        self.Lep_phi       = self.activate("f", "lep_phi",                  max_Lep)
-        self.Lep_e         = self.activate("f", "lep_E",                    max_Lep)
-        self.Lep_pdgid     = self.activate("i", "lep_type",                 max_Lep)
-        self.Lep_charge    = self.activate("f", "lep_charge",               max_Lep)
-        self.Lep_ptcone30  = self.activate("f", "lep_ptcone30",             max_Lep)
-        self.Lep_etcone20  = self.activate("f", "lep_etcone20",             max_Lep)                    
-        self.Lep_d0        = self.activate("f", "lep_trackd0pvunbiased",    max_Lep)
-        self.Lep_d0Sig     = self.activate("f", "lep_tracksigd0pvunbiased", max_Lep)
-        self.Lep_trigMatch = self.activate("b", "lep_trigMatched",          max_Lep)
-        self.Lep_z0        = self.activate("f", "lep_z0",                   max_Lep)
-        self.Lep_flag      = self.activate("i", "lep_flag",                 max_Lep)
-
-        self.Leptons = [Lepton(i,self) for i in range(0,max_Lep)]
-
+        max_Lep = min(abs(max_Lep), MaxObjects)
+        for attribute, branchname, vartype in LeptonBranches:
+            setattr(self, attribute, self.activate(vartype, branchname, max_Lep))
          
         #JetInfo
         max_Jet = self.GetMaximum("alljet_n")
-        max_Jet = min(abs(max_Jet), 20)
-        self.Jet_n        = self.activate("i", "alljet_n",     1)
-        self.Jet_pt       = self.activate("f", "jet_pt",       max_Jet)
-        self.Jet_eta      = self.activate("f", "jet_eta",      max_Jet)
-        self.Jet_e        = self.activate("f", "jet_E",        max_Jet)
-        ## self.Jet_flag     = self.activate("i", "jet_flag",     max_Jet)
-        self.Jet_phi      = self.activate("f", "jet_phi",      max_Jet)
-        self.Jet_mass     = self.activate("f", "jet_m",        max_Jet)
-        self.Jet_jvf      = self.activate("f", "jet_jvf",      max_Jet)
-        self.Jet_mv1      = self.activate("f", "jet_MV1",      max_Jet)
-         
-        self.Jets = [Jet(i, self) for i in range(0,max_Jet)]
-         
-        #EtMissInfo
-        self.Met_et   = self.activate( "f", "met_et",  1)
-        self.Met_phi  = self.activate( "f", "met_phi", 1)
-        
-        self.EtMiss = EtMiss(self)
-                
+        max_Jet = min(abs(max_Jet), MaxObjects)
+        for attribute, branchname, vartype in JetBranches:
+            setattr(self, attribute, self.activate(vartype, branchname, max_Jet))
+
+        self.createObjects(max_Lep, max_Jet)
+
+    def initializeBatches(self, tree, chunkSize):
+        """Setup for the columnar mode. Nothing is bound to the tree, the active branches are read chunkSize entries
+        at a time by iterateBatches. The object views (Lepton, Jet, ...) are still created, so that the event based
+        analysis code can be run on the batches via loadBatchEvent.
+        """
+        self.Tree = tree
+        self.ChunkSize = chunkSize
+        self.Tree.SetBranchStatus("*",0)
+        for attribute, branchname, vartype in EventBranches + LeptonBranches + JetBranches:
+            self.Tree.SetBranchStatus(branchname,1)
+
+        self.createObjects(MaxObjects, MaxObjects)
+
+    def initializeColumnCache(self, filenames, columnCache, chunkSize):
+        """Setup for the columnar mode with the batches read from the ColumnCache instead of the tree. Files that are
+        not cached yet are converted. The batches are views of the mapped columns, so they never span two files.
+        """
+        self.ChunkSize = chunkSize
+        eventBranches, collections = batchBranches()
+        self.CachedFiles = [columnCache.open(filename, eventBranches, collections) for filename in filenames]
+        self.FileOffsets = numpy.cumsum([0] + [len(columns["lep_n"]) for columns, offsets in self.CachedFiles])
+        self.createObjects(MaxObjects, MaxObjects)
+
+    def createObjects(self, max_Lep, max_Jet, branches = None):
+        branches = branches if branches is not None else self
+        self.EventInfo = EventInfo(branches)
+        self.EtMiss    = EtMiss(branches)
+        self.Leptons   = [Lepton(i, branches) for i in range(0,max_Lep)]
+        self.Jets      = [Jet(i, branches) for i in range(0,max_Jet)]
+        for attribute, source in GeVAttributes:
+            setattr(self, attribute, [0.])
+        # TLorentzVectors handed out by the tlv accessors, one per object slot (not one per collection, so that
+        # the vectors of several objects can be combined), created on first use and reused for every event
+        self.EtMissVectors = []
+        self.LeptonVectors = []
+        self.JetVectors    = []
                 
     def activate(self, vartype,  branchname, maxlength):
+        if branchname not in self.ActiveBranches:
+            return MissingBranch(branchname)
         variable = array(vartype,[0]*maxlength)
         self.Tree.SetBranchStatus(branchname,1)
         self.Tree.SetBranchAddress( branchname, variable)   
         return variable
+
+    def startRecording(self):
+        """From now on the object views record the branches they read in the returned BranchRecorder."""
+        self.Recorder = BranchRecorder(self)
+        self.createObjects(len(self.Leptons), len(self.Jets), self.Recorder)
+        return self.Recorder
+
+    def getEntry(self, entry):
+        """Reads all active branches of entry."""
+        self.Tree.GetEntry(entry)
+        self.CurrentEntry = entry
+        self.Cache.clear()
+
+    # Staged read mode
+    def loadEntry(self, entry):
+        """Reads the event level branches of entry, the staged branches are read on demand by loadStage."""
+        self.Cache.clear()
+        self.CurrentEntry = entry
+        self.LocalEntry = self.Tree.LoadTree(entry)
+        # the TBranch objects belong to the current tree of the chain
+        if self.Tree.GetTreeNumber() != self.TreeNumber:
+            self.TreeNumber = self.Tree.GetTreeNumber()
+            self.setupStagedBranches()
+        for branch in self.EventBranchList:
+            branch.GetEntry(self.LocalEntry)
+        self.Pending = set(StagedBranches)
+
+    def setupStagedBranches(self):
+        staged = set(sum(StagedBranches.values(), []))
+        self.EventBranchList  = [self.Tree.GetBranch(branchname) for attribute, branchname, vartype in EventBranches
+                                 if branchname in self.ActiveBranches and branchname not in staged]
+        self.StageBranchLists = dict((stage, [self.Tree.GetBranch(branchname) for branchname in branchnames if branchname in self.ActiveBranches])
+                                     for stage, branchnames in StagedBranches.items())
+
+    def loadStage(self, stage):
+        if stage in self.Pending:
+            self.Pending.discard(stage)
+            for branch in self.StageBranchLists[stage]:
+                branch.GetEntry(self.LocalEntry)
+
+    # Columnar mode
+    def iterateBatches(self, firstEntry, lastEntry):
+        """Yields EventBatches covering the entries [firstEntry, lastEntry) of the tree."""
+        if self.CachedFiles is not None:
+            for batch in self.iterateCachedBatches(firstEntry, lastEntry):
+                yield batch
+            return
+        eventBranches, collections = batchBranches()
+        for first in xrange(firstEntry, lastEntry, self.ChunkSize):
+            nEntries = min(self.ChunkSize, lastEntry - first)
+            self.Batch = EB.readBatch(self.Tree, first, nEntries, eventBranches, collections)
+            yield self.Batch
+
+    def iterateCachedBatches(self, firstEntry, lastEntry):
+        eventBranches, collections = batchBranches()
+        for (columns, offsets), fileFirst, fileLast in zip(self.CachedFiles, self.FileOffsets[:-1], self.FileOffsets[1:]):
+            for first in xrange(max(firstEntry, fileFirst), min(lastEntry, fileLast), self.ChunkSize):
+                nEntries = min(self.ChunkSize, lastEntry - first, fileLast - first)
+                begin    = first - fileFirst
+                end      = begin + nEntries
+                batch    = EB.EventBatch(first, nEntries)
+                for branchname, vartype in eventBranches:
+                    batch.Columns[branchname] = columns[branchname][begin:end]
+                for counterBranch, branches in collections:
+                    batchOffsets = offsets[counterBranch][begin:end+1] - offsets[counterBranch][begin]
+                    contentBegin = offsets[counterBranch][begin]
+                    for branchname, vartype in branches:
+                        content = columns[branchname][contentBegin:contentBegin + batchOffsets[-1]]
+                        batch.Columns[branchname] = EB.JaggedArray(content, batchOffsets)
+                self.Batch = batch
+                yield self.Batch
+
+    def loadBatchEvent(self, i):
+        """Points the per event buffers at event i of the current batch. Afterwards the object accessors behave
+        exactly as if the entry had been read via GetEntry.
+        """
+        self.Cache.clear()
+        self.CurrentEntry = self.Batch.FirstEntry + i
+        for attribute, branchname, vartype in EventBranches:
+            setattr(self, attribute, self.Batch[branchname][i:i+1])
+        for attribute, branchname, vartype in LeptonBranches + JetBranches:
+            setattr(self, attribute, self.Batch[branchname][i])
     
-    # Used for a quick scan to get the largest value encountered in the tuple
+    # Event cache
+    def cached(self, key, function):
+        """Returns function() for the current event. It is only evaluated by the first call with key per event, later
+        calls return the stored result, so function may only depend on the event. Cached objects are shared and must
+        not be modified. Hits and misses are counted per key in CacheStatistics."""
+        statistics = self.CacheStatistics.get(key)
+        if statistics is None:
+            statistics = self.CacheStatistics[key] = [0, 0]
+        if key in self.Cache:
+            statistics[0] += 1
+            return self.Cache[key]
+        statistics[1] += 1
+        value = self.Cache[key] = function()
+        return value
+
+    def initializeDerived(self, filenames, fileEntries, derivedCache, save = True):
+        """Reads the derived variables of the input files stored in derivedCache, the variables computed during the
+        job are added to it by saveDerived unless save is False."""
+        self.DerivedCache   = derivedCache
+        self.SaveDerived    = save
+        self.DerivedFiles   = list(filenames)
+        self.DerivedEntries = list(fileEntries)
+        self.DerivedOffsets = list(numpy.cumsum([0] + self.DerivedEntries))
+        self.DerivedColumns = [derivedCache.load(filename) for filename in self.DerivedFiles]
+        self.DerivedValues  = [{} for filename in self.DerivedFiles]
+
+    def derived(self, name, function):
+        """Numeric variable of the current event, like cached. If the DerivedCache is used, the value stored for the
+        entry is returned if there is one, otherwise the computed value is added to the cache."""
+        if self.DerivedCache is None or name in self.Cache:
+            return self.cached(name, function)
+        fileIndex = bisect.bisect_right(self.DerivedOffsets, self.CurrentEntry) - 1
+        localEntry = self.CurrentEntry - self.DerivedOffsets[fileIndex]
+        column = self.DerivedColumns[fileIndex].get(name)
+        # entries for which the variable was never computed hold NaN
+        if column is not None and column[localEntry] == column[localEntry]:
+            value = self.Cache[name] = float(column[localEntry])
+            self.CacheStatistics.setdefault(name + " (derived cache)", [0, 0])[0] += 1
+            return value
+        value = self.cached(name, function)
+        entries, values = self.DerivedValues[fileIndex].setdefault(name, ([], []))
+        entries.append(localEntry)
+        values.append(value)
+        return value
+
+    def saveDerived(self):
+        if self.DerivedCache is None or not self.SaveDerived: return
+        for filename, nEntries, values in zip(self.DerivedFiles, self.DerivedEntries, self.DerivedValues):
+            if values:
+                self.DerivedCache.update(filename, nEntries, values)
+
+    def getEventWeight(self):
+        """Weight of a simulated event, scalefactor()*eventWeight() of the EventInfo."""
+        return self.cached("EventWeight", lambda: self.EventInfo.scalefactor()*self.EventInfo.eventWeight())
+
+    # Used for a quick scan to get the largest value encountered in the tuple, if it is not known already
     def GetMaximum(self,branchname):
+        if branchname in self.Maxima:
+            return self.Maxima[branchname]
         self.Tree.SetBranchStatus(branchname,1)
         return int(self.Tree.GetMaximum(branchname))
     
     # Functions to retrieve object collections (Tuplereader is called Store in the analysis code)
     def getEtMiss(self):
-        return self.EtMiss
+        if self.Pending: self.loadStage("EtMiss")
+        return self.cached("EtMiss", self.prepareEtMiss)
         
     def getEventInfo(self):
         return self.EventInfo
         
     def getLeptons(self):
-        return self.Leptons[:self.Lep_n[0]]
+        if self.Pending: self.loadStage("Leptons")
+        return self.cached("Leptons", self.prepareLeptons)
     
     def getJets(self):
-        return self.Jets[:self.Jet_n[0]]
+        if self.Pending: self.loadStage("Jets")
+        return self.cached("Jets", self.prepareJets)
+
+    # Conversion to GeV, done by the first call of the collection accessors per event
+    def prepareEtMiss(self):
+        self.Met_etGeV = toGeV(self.Met_et, 1)
+        return self.EtMiss
+
+    def prepareLeptons(self):
+        n = self.Lep_n[0]
+        self.Lep_ptGeV = toGeV(self.Lep_pt, n)
+        self.Lep_eGeV  = toGeV(self.Lep_e, n)
+        return self.Leptons[:n]
+
+    def prepareJets(self):
+        n = self.Jet_n[0]
+        self.Jet_ptGeV = toGeV(self.Jet_pt, n)
+        self.Jet_eGeV  = toGeV(self.Jet_e, n)
+        return self.Jets[:n]
+
+#===========================================================
+
+class BranchRecorder(object):
+    """Stands in for the TupleReader in the object views and records the names of the branches they read."""
+    def __init__(self, store):
+        super(BranchRecorder, self).__init__()
+        self.Store = store
+        self.Used  = set()
+
+    def __getattr__(self, attribute):
+        if attribute in BranchAttributes:
+            self.Used.add(BranchAttributes[attribute])
+        return getattr(self.Store, attribute)
+
+class MissingBranch(object):
+    """Stands in for the buffer of a branch that is not in the branch manifest of the job. Reading it raises an error,
+    as the manifest was recorded on entries for which the analyses never read the branch."""
+    __slots__ = ("Branchname",)
+
+    def __init__(self, branchname):
+        super(MissingBranch, self).__init__()
+        self.Branchname = branchname
+
+    def __getitem__(self, index):
+        raise RuntimeError("Branch %s is not in the branch manifest of the analyses, record it again with --record-branches "
+                           "or run without the BranchManifest setting" % self.Branchname)
+
+#===========================================================
+
+def toGeV(values, n):
+    """The first n values converted from MeV to GeV, the conversion of a MissingBranch fails when the result is read."""
+    if values.__class__ is MissingBranch:
+        return values
+    return [value*0.001 for value in values[:n]]
+
+def fourVector(vectors, i, pt, eta, phi, e):
+    """Sets and returns the TLorentzVector of object slot i in vectors. Each slot has its own vector, which is
+    overwritten by the next tlv call for the same slot, e.g. in the next event."""
+    while len(vectors) <= i:
+        vectors.append(ROOT.TLorentzVector())
+    vectors[i].SetPtEtaPhiE(pt, eta, phi, e)
+    return vectors[i]
 
 #===========================================================
 
@@ -117,20 +432,17 @@ class EtMiss(object):
     Missing Transverse Momentum has only two variables, its magnitude (et) and its azimuthal angle (phi).
     It is used as a proxy for all particles that escaped detection (neutrinos and the likes).
     """
+    __slots__ = ("Branches",)
+
     def __init__(self, branches):
         super(EtMiss, self).__init__()
         self.Branches = branches
-        self._tlv     = None
     
     def tlv(self):
-      if self._tlv == None:
-        self._tlv = ROOT.TLorentzVector()
-      if self.et() != self._tlv.Pt():
-        self._tlv.SetPtEtaPhiE(self.et(), 0, self.phi(), self.et())
-      return self._tlv
+      return fourVector(self.Branches.EtMissVectors, 0, self.et(), 0, self.phi(), self.et())
     
     def et(self):
-      return self.Branches.Met_et[0]*0.001
+      return self.Branches.Met_etGeV[0]
 
     def phi(self):
       return self.Branches.Met_phi[0]
@@ -147,6 +459,8 @@ class EventInfo(object):
     information that may be used for selection purposes (passGRL, hasGoodVertex, numberofVertices, triggeredByElectron, 
     triggeredByMuon)
     """
+    __slots__ = ("Branches",)
+
     def __init__(self, branches):
         super(EventInfo, self).__init__()
         self.Branches = branches
@@ -196,21 +510,18 @@ class Lepton(object):
     the quality of the reconstruction result (isTight), and auxillary information
     (pdgId, charge, isolation variables like isoptcone30, d0, z0...).
     """
+    __slots__ = ("Branches", "idNr")
+
     def __init__(self, idNr, branches):
         super(Lepton, self).__init__()
         self.Branches = branches
         self.idNr = idNr
-        self._tlv = None
 
     def tlv(self):
-      if self._tlv == None:
-        self._tlv = ROOT.TLorentzVector()
-      if self.pt() != self._tlv.Pt():
-        self._tlv.SetPtEtaPhiE(self.pt(), self.eta(), self.phi(), self.e())
-      return self._tlv
+      return fourVector(self.Branches.LeptonVectors, self.idNr, self.pt(), self.eta(), self.phi(), self.e())
       
     def pt(self):
-      return self.Branches.Lep_pt[self.idNr]*0.001
+      return self.Branches.Lep_ptGeV[self.idNr]
 
     def eta(self):
       return self.Branches.Lep_eta[self.idNr]
@@ -219,7 +530,7 @@ class Lepton(object):
       return self.Branches.Lep_phi[self.idNr]
 
     def e(self):
-      return self.Branches.Lep_e[self.idNr]*0.001
+      return self.Branches.Lep_eGeV[self.idNr]
 
     def isTight(self):
       return bool(self.Branches.Lep_flag[self.idNr] & 512)
@@ -264,21 +575,18 @@ class Jet(object):
     auxillary information (mv1, jvf). Truth information regarding the flavour of the quark they com from (truepdgid)
     and whether they were matched to a true jet (isTrueJet) is available.
     """
+    __slots__ = ("Branches", "idNr")
+
     def __init__(self, idNr, branches):
         super(Jet, self).__init__()
         self.idNr = idNr
         self.Branches = branches
-        self._tlv = None
 
     def tlv(self):
-      if self._tlv == None:
-        self._tlv = ROOT.TLorentzVector()
-      if self.pt() != self._tlv.Pt():
-        self._tlv.SetPtEtaPhiE(self.pt(), self.eta(), self.phi(), self.e())
-      return self._tlv
+      return fourVector(self.Branches.JetVectors, self.idNr, self.pt(), self.eta(), self.phi(), self.e())
     
     def pt(self):
-      return self.Branches.Jet_pt[self.idNr]*0.001
+      return self.Branches.Jet_ptGeV[self.idNr]
     
     def eta(self):
       return self.Branches.Jet_eta[self.idNr]
@@ -287,7 +595,7 @@ class Jet(object):
       return self.Branches.Jet_phi[self.idNr]
     
     def e(self):
-      return self.Branches.Jet_e[self.idNr]*0.001
+      return self.Branches.Jet_eGeV[self.idNr]
     
     def m(self):
       return self.Branches.Jet_mass[self.idNr]
@@ -10,9 +10,12 @@ class WAnalysis(Analysis.Analysis):
   """
   def __init__(self, store):
       super(WAnalysis, self).__init__(store)
+      self.Preselection = AH.StandardEventCutsExpression
 
   
   def initialize(self):
+      self.cut_EventCuts, self.cut_1_high_pt_Leptons = self.addCuts(["EventCuts", "1 high pt Leptons"])
+
       self.hist_WtMass      =  self.addStandardHistogram("WtMass")
       self.hist_leptn       =  self.addStandardHistogram("lep_n")
       self.hist_leptpt      =  self.addStandardHistogram("lep_pt")
@@ -40,30 +43,29 @@ class WAnalysis(Analysis.Analysis):
   def analyze(self):
       # retrieving objects
       eventinfo = self.Store.getEventInfo()
-      weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
-      self.countEvent("no cut", weight)
+      weight = self.Store.getEventWeight() if not self.getIsData() else 1
       
       # apply standard event based selection
       if not AH.StandardEventCuts(eventinfo): return False
-      self.countEvent("EventCuts", weight)
+      self.countEvent(self.cut_EventCuts, weight)
       
       # Lepton Requirements
-      goodLeptons = AH.selectAndSortContainer(self.Store.getLeptons(), AH.isGoodLepton, lambda p: p.pt())
+      goodLeptons = AH.goodLeptons(self.Store)
       if not (len(goodLeptons) == 1): return False
-      self.countEvent("1 high pt Leptons", weight)
+      self.countEvent(self.cut_1_high_pt_Leptons, weight)
 
       lepton = goodLeptons[0]
 
       # cut on W boson candidate
       etmiss = self.Store.getEtMiss()
-      if not AH.WTransverseMass(lepton, etmiss) > 30: return False;
+      if not AH.leadingLeptonWTransverseMass(self.Store) > 30: return False;
       if not etmiss.et() > 30: return False
       
       self.hist_vxp_z.Fill(eventinfo.primaryVertexPosition(), weight)
       self.hist_pvxp_n.Fill(eventinfo.numberOfVertices(), weight)
       
       # W boson histogram
-      self.hist_WtMass.Fill(AH.WTransverseMass(lepton, etmiss), weight)
+      self.hist_WtMass.Fill(AH.leadingLeptonWTransverseMass(self.Store), weight)
 
       # missing transverse momentum histogram
       self.hist_etmiss.Fill(etmiss.et(), weight)
@@ -81,7 +83,7 @@ class WAnalysis(Analysis.Analysis):
       self.hist_lepd0.Fill(lepton.d0(), weight)
       
       # Jet Histograms
-      jets = AH.selectAndSortContainer(self.Store.getJets(), AH.isGoodJet, lambda p: p.pt())
+      jets = AH.goodJets(self.Store)
       self.hist_njets.Fill(len(jets), weight)
       [self.hist_jetm.Fill(jet.m(), weight) for jet in jets]
       [self.hist_jetspt.Fill(jet.pt(), weight) for jet in jets]
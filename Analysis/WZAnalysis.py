@@ -1,9 +1,7 @@
 import ROOT
-import itertools 
 
 import Analysis
 import AnalysisHelpers as AH
-import Constants
 
 #======================================================================
         
@@ -11,9 +9,12 @@ class WZAnalysis(Analysis.Analysis):
   """Analysis searching for the pair production of WZ with both boson decaying to leptons"""
   def __init__(self, store):
       super(WZAnalysis, self).__init__(store)
+      self.Preselection = AH.StandardEventCutsExpression
 
   
   def initialize(self):
+      self.cut_EventCuts, self.cut_3_high_pt_Leptons = self.addCuts(["EventCuts", "3 high pt Leptons"])
+
       self.invMass          =  self.addStandardHistogram("invMass")
       self.WtMass           =  self.addStandardHistogram("WtMass")
       
@@ -33,53 +34,33 @@ class WZAnalysis(Analysis.Analysis):
       self.hist_vxp_z       = self.addStandardHistogram("vxp_z")
       self.hist_pvxp_n      = self.addStandardHistogram("pvxp_n")
 
-
-  def ZWindow(self, lep1, lep2):
-      return abs((lep1.tlv()+lep2.tlv()).M() - Constants.Z_Mass)
-    
-  def TestWZCandidate(self, candidate):
-      return self.ZWindow(candidate[0], candidate[1])
-
-  def WZCandidate(self, leptons):
-      def isValidCandidate(lep1, lep2):
-          if lep1.charge()*lep2.charge() > 0: return False
-          if abs(lep1.pdgId()) != abs(lep2.pdgId()): return False
-          return True
-    
-      bestCandidate = None
-      for p in itertools.permutations(leptons, 3):
-         if not isValidCandidate(p[0], p[1]): continue
-         if bestCandidate is None:
-             bestCandidate = p            
-         if self.TestWZCandidate(p) < self.TestWZCandidate(bestCandidate):
-             bestCandidate = p
-      return bestCandidate
     
   def analyze(self):
       # retrieving objects
       eventinfo = self.Store.getEventInfo()
-      weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
+      weight = self.Store.getEventWeight() if not self.getIsData() else 1
             
       # apply standard event based selection
       if not AH.StandardEventCuts(eventinfo): return False
-      self.countEvent("EventCuts", weight)
+      self.countEvent(self.cut_EventCuts, weight)
        
       # Lepton Requirements
-      goodLeptons = AH.selectAndSortContainer(self.Store.getLeptons(), AH.isGoodLepton, lambda p: p.pt())
+      goodLeptons = AH.goodLeptons(self.Store)
       if not (len(goodLeptons) == 3): return False
-      self.countEvent("3 high pt Leptons", weight)
+      self.countEvent(self.cut_3_high_pt_Leptons, weight)
 
       # find candidate for WZ system
-      candidate = self.WZCandidate(goodLeptons)
-      if candidate is None: return False;
+      pairing, zWindow = AH.bestPairing(goodLeptons, 1, AH.ZWindowScore)
+      if pairing is None: return False;
 
-      z1Lepton = candidate[0]
-      z2Lepton = candidate[1]
-      wLepton  = candidate[2]
+      (i, j), = pairing
+      z1Lepton = goodLeptons[i]
+      z2Lepton = goodLeptons[j]
+      wLepton  = goodLeptons[3 - i - j]
       etmiss = self.Store.getEtMiss()
 
       # test candidate for WZ system
-      if not self.ZWindow(z1Lepton, z2Lepton) < 10: return False;
+      if not zWindow < 10: return False;
       if not AH.WTransverseMass(wLepton, etmiss) > 30: return False;
 
       # histograms for missing et
@@ -90,7 +71,7 @@ class WZAnalysis(Analysis.Analysis):
       self.hist_pvxp_n.Fill(eventinfo.numberOfVertices(), weight)
       
       # WZ system histograms
-      self.invMass.Fill((z1Lepton.tlv() + z2Lepton.tlv()).M(), weight)
+      self.invMass.Fill(AH.invariantMass(z1Lepton, z2Lepton), weight)
       self.WtMass.Fill(AH.WTransverseMass(wLepton, etmiss), weight)
 
       # lepton histograms
@@ -0,0 +1,311 @@
+"""Work queue on a shared filesystem for running the chunks of a run on several machines, see RunScript.py --queue.
+The coordinator publishes one task per job (sample, input files, entry range, chunk number and settings) as a JSON
+file in <queue>/pending/. Workers, started on any machine that sees the queue directory, claim a task by renaming it
+to <queue>/running/<task>@<worker>; the rename is atomic, so every task is claimed by exactly one worker. The worker
+runs the job in a child process and touches the claimed file every HeartbeatInterval seconds while waiting for it, so
+the heartbeat does not depend on the job releasing the GIL. Each attempt writes its outputs to hidden files next to
+the final ones and its derived variables to <queue>/attempts/<task>@<worker>/. When the job is done the worker moves
+the task to done/ or failed/, then moves the outputs into place and writes the number of entries and the run time,
+or the error, to <queue>/results/<task>@<worker>, which completes the task.
+The coordinator moves tasks without a heartbeat for StallTimeout seconds back to pending/, requeues failed tasks up to
+MaxAttempts times and creates <queue>/finished once all tasks are done, which stops the workers. A worker whose task
+was moved back kills its job and discards the outputs of the attempt, so only one attempt ever publishes them.
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+import time
+import traceback
+from multiprocessing import Process
+
+import DerivedCache
+import EventCounter
+import Job
+
+# Seconds between the heartbeats of a worker and after which a task without heartbeat is given to another worker
+HeartbeatInterval = 10.
+StallTimeout      = 60.
+
+# Seconds between two looks at the queue, of the coordinator and of idle workers
+PollInterval = 1.
+
+# Number of times a task is run before the run is given up
+MaxAttempts = 3
+
+Directories = ["pending", "running", "done", "failed", "results", "stalled", "attempts"]
+
+#======================================================================
+
+class WorkQueue(object):
+    """Access to the queue directory, for the coordinator and the workers."""
+    def __init__(self, directory):
+        super(WorkQueue, self).__init__()
+        self.Directory = directory
+        self.FinishedLocation = os.path.join(directory, "finished")
+        self.TaskNames = []
+        self.Reclaimed = 0
+        self.Failures  = 0
+
+    def location(self, state, name = ""):
+        return os.path.join(self.Directory, state, name)
+
+    def names(self, state):
+        return sorted([name for name in os.listdir(self.location(state)) if not name.startswith(".")])
+
+    # Coordinator
+    def publish(self, jobs):
+        """Clears the queue and publishes one task per job, the workers claim them in the given order."""
+        if os.path.exists(self.FinishedLocation):
+            os.remove(self.FinishedLocation)
+        for state in Directories:
+            if os.path.exists(self.location(state)):
+                shutil.rmtree(self.location(state))
+            os.makedirs(self.location(state))
+        self.TaskNames = ["%05d" % i for i in range(len(jobs))]
+        for name, job in zip(self.TaskNames, jobs):
+            writeJSON(self.location("pending", name), jobToTask(job))
+        self.log("Published %d tasks in %s" % (len(jobs), self.Directory))
+
+    def coordinate(self):
+        """Waits until all tasks are done, reclaiming stalled and requeueing failed tasks, and logs the progress.
+        Returns the (entries, seconds) of the tasks in the order they were published, None if a task failed too often."""
+        lastSummary = None
+        while True:
+            self.reclaimStalled()
+            failed = self.requeueFailed()
+            summary = self.summary()
+            if summary != lastSummary:
+                self.log(summary)
+                lastSummary = summary
+            if failed is not None:
+                self.log("Task %s failed %d times, giving up:\n%s" % (failed.split("@", 1)[0], MaxAttempts, readJSON(self.location("results", failed))["Error"]))
+                break
+            if len(self.completed("done")) == len(self.TaskNames):
+                break
+            time.sleep(PollInterval)
+        open(self.FinishedLocation, "w").close()
+        if failed is not None:
+            return None
+        results = dict((completed.split("@", 1)[0], readJSON(self.location("results", completed))["Result"]) for completed in self.completed("done"))
+        return [tuple(results[name]) for name in self.TaskNames]
+
+    def completed(self, state):
+        """Tasks in state done or failed whose worker wrote the result, i.e. also published the outputs."""
+        return [name for name in self.names(state) if os.path.exists(self.location("results", name))]
+
+    def reclaimStalled(self):
+        """Requeues the running tasks without heartbeat, as well as the done or failed ones whose worker died before
+        writing the result."""
+        now = time.time()
+        for state in ["running", "done", "failed"]:
+            for claimed in self.names(state):
+                try:
+                    if state != "running" and os.path.exists(self.location("results", claimed)): continue
+                    if now - os.path.getmtime(self.location(state, claimed)) < StallTimeout: continue
+                    # moving the task away first makes sure its worker can no longer complete it
+                    os.rename(self.location(state, claimed), self.location("stalled", claimed))
+                except OSError: # completed in the meantime
+                    continue
+                name, worker = claimed.split("@", 1)
+                self.log("Task %s of worker %s stalled, requeueing it" % (name, worker))
+                self.Reclaimed += 1
+                self.requeue(self.location("stalled", claimed), name, False)
+
+    def requeueFailed(self):
+        """Requeues the failed tasks, returns <task>@<worker> of a task that failed MaxAttempts times or None."""
+        for completed in self.completed("failed"):
+            name, worker = completed.split("@", 1)
+            self.Failures += 1
+            self.log("Task %s failed on worker %s: %s" % (name, worker, readJSON(self.location("results", completed))["Error"].strip().splitlines()[-1]))
+            if not self.requeue(self.location("failed", completed), name, True):
+                return completed
+        return None
+
+    def requeue(self, location, name, failed):
+        task = readJSON(location)
+        if failed:
+            task["Attempts"] = task.get("Attempts", 0) + 1
+            if task["Attempts"] >= MaxAttempts:
+                return False
+        writeJSON(self.location("pending", name), task)
+        os.remove(location)
+        return True
+
+    def summary(self):
+        running = self.names("running")
+        return "%d/%d tasks done, %d running (%s), %d pending, %d reclaimed, %d failed attempts" % (
+            len(self.completed("done")), len(self.TaskNames), len(running), ", ".join(sorted(set([claimed.split("@", 1)[1] for claimed in running]))),
+            len(self.names("pending")), self.Reclaimed, self.Failures)
+
+    # Worker
+    def claim(self, worker):
+        """Claims the next pending task, returns (name, task) or None if there is none."""
+        for name in self.names("pending"):
+            claimed = self.location("running", name + "@" + worker)
+            try:
+                os.rename(self.location("pending", name), claimed)
+            except OSError: # claimed by another worker
+                continue
+            os.utime(claimed, None)
+            return name, readJSON(claimed)
+        return None
+
+    def complete(self, name, worker, result = None, error = None, publish = None):
+        """Reports the result or the error of a claimed task. Returns False if the task was reclaimed meanwhile,
+        otherwise the task is moved to done/ or failed/ and publish, if given, is called before the result is written."""
+        claimed = name + "@" + worker
+        try:
+            # the heartbeat gives the worker StallTimeout seconds to publish the outputs
+            os.utime(self.location("running", claimed), None)
+            os.rename(self.location("running", claimed), self.location("done" if error is None else "failed", claimed))
+        except OSError:
+            return False
+        if publish is not None:
+            publish()
+        writeJSON(self.location("results", claimed), {"Result": result, "Error": error})
+        return True
+
+    def isFinished(self):
+        return os.path.exists(self.FinishedLocation)
+
+    def log(self, message):
+        print time.ctime() + " WorkQueue: " + message
+        sys.stdout.flush()
+
+#======================================================================
+
+def work(directory, worker = None):
+    """Worker loop: runs the tasks of the queue in directory until the coordinator declares the run finished."""
+    worker = worker or "%s.%d" % (socket.gethostname(), os.getpid())
+    queue = WorkQueue(directory)
+    queue.log("Worker %s started" % worker)
+    while not queue.isFinished():
+        claimed = queue.claim(worker) if os.path.isdir(queue.location("pending")) else None
+        if claimed is None:
+            time.sleep(PollInterval)
+            continue
+        name, task = claimed
+        attempt = name + "@" + worker
+        attemptDirectory = queue.location("attempts", attempt)
+        outputs = stageOutputs(taskToJob(task), attempt)
+        result, error = runAttempt(queue.location("running", attempt), task, attempt, attemptDirectory)
+        reclaimed = result is None and error is None
+        publish = lambda: publishAttempt(outputs, attemptDirectory, task["Configuration"].get("CacheDirectory", "cache/"))
+        if reclaimed or not queue.complete(name, worker, result, error, publish if error is None else None):
+            queue.log("Task %s was given to another worker, result dropped" % name)
+        discardAttempt(outputs, attemptDirectory)
+    queue.log("Worker %s finished" % worker)
+
+def runAttempt(claimedLocation, task, attempt, attemptDirectory):
+    """Runs the job of task in a child process and touches claimedLocation every HeartbeatInterval seconds until it
+    is done. If the task is reclaimed meanwhile the job is killed. Returns (result, error), both None if reclaimed."""
+    os.makedirs(attemptDirectory)
+    resultLocation = os.path.join(attemptDirectory, "result.json")
+    process = Process(target=runJob, args=(task, attempt, attemptDirectory, resultLocation))
+    process.start()
+    while True:
+        process.join(HeartbeatInterval)
+        if not process.is_alive():
+            break
+        try:
+            os.utime(claimedLocation, None)
+        except OSError: # reclaimed by the coordinator
+            process.terminate()
+            process.join()
+            return None, None
+    if not os.path.exists(resultLocation):
+        return None, "Job process of task %s exited with code %s without result" % (attempt, process.exitcode)
+    attemptResult = readJSON(resultLocation)
+    return attemptResult["Result"], attemptResult["Error"]
+
+def runJob(task, attempt, attemptDirectory, resultLocation):
+    """Child process of an attempt: runs the job of task with the outputs staged for attempt and the derived variables
+    written to the DerivedCache in attemptDirectory."""
+    try:
+        job = taskToJob(task)
+        stageOutputs(job, attempt)
+        job.initialize()
+        if job.Store.DerivedCache is not None:
+            job.Store.DerivedCache = DerivedCache.DerivedCache(attemptDirectory, job.Store.DerivedCache.CodeHash, job.Store.DerivedCache.TreeName)
+        job.execute()
+        job.finalize()
+        result, error = (job.MaxEvents, job.JobStatistics.elapsedTime()), None
+    except (Exception, SystemExit):
+        result, error = None, traceback.format_exc()
+    writeJSON(resultLocation, {"Result": result, "Error": error})
+
+def stageOutputs(job, attempt):
+    """Points the output files and skims of job at hidden files of attempt next to them. Returns the (staged, final)
+    locations of all files the job may write."""
+    outputs = []
+    locations = []
+    for location in job.OutputFileLocations:
+        staged = stagedLocation(location, attempt)
+        outputs.append((staged + ".root", location + ".root"))
+        outputs.append((EventCounter.cutflowLocation(staged + ".root"), EventCounter.cutflowLocation(location + ".root")))
+        locations.append(staged)
+    job.OutputFileLocations = locations
+    skimLocations = []
+    for location in job.SkimLocations:
+        staged = stagedLocation(location, attempt)
+        outputs.append((staged, location))
+        skimLocations.append(staged)
+    job.SkimLocations = skimLocations
+    return outputs
+
+def stagedLocation(location, attempt):
+    directory, name = os.path.split(location)
+    return os.path.join(directory, ".%s.%s" % (name, attempt))
+
+def publishAttempt(outputs, attemptDirectory, cacheDirectory):
+    for staged, final in outputs:
+        if os.path.exists(staged):
+            os.rename(staged, final)
+    DerivedCache.merge(attemptDirectory, cacheDirectory)
+
+def discardAttempt(outputs, attemptDirectory):
+    for staged, final in outputs:
+        if os.path.exists(staged):
+            os.remove(staged)
+    shutil.rmtree(attemptDirectory, True)
+
+def jobToTask(job):
+    return {
+        "Name"          : job.Name,
+        "Configuration" : job.Configuration,
+        "InputLocation" : job.InputLocation,
+        "InputFiles"    : job.InputFiles,
+        "EntryRange"    : job.EntryRange,
+        "ChunkNumber"   : job.ChunkNumber,
+        "Attempts"      : 0,
+    }
+
+def taskToJob(task):
+    task = encode(task)
+    entryRange = tuple(task["EntryRange"]) if task["EntryRange"] is not None else None
+    return Job.Job(task["Name"], task["Configuration"], task["InputLocation"], task["InputFiles"], entryRange, task["ChunkNumber"])
+
+def encode(value):
+    """Converts the unicode strings read from JSON to str, as passed to ROOT."""
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return dict((encode(key), encode(item)) for key, item in value.items())
+    return value
+
+def readJSON(location):
+    with open(location) as jsonFile:
+        return json.load(jsonFile)
+
+def writeJSON(location, content):
+    """Writes content to location atomically, through a hidden temporary file in the same directory."""
+    directory, name = os.path.split(location)
+    temporaryLocation = os.path.join(directory, ".%s.%d.tmp" % (name, os.getpid()))
+    with open(temporaryLocation, "w") as jsonFile:
+        json.dump(content, jsonFile, indent=1, sort_keys=True)
+    os.rename(temporaryLocation, location)
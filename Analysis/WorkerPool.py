@@ -0,0 +1,40 @@
+"""Worker pool whose processes start warm.
+The ROOT classes used by the jobs, the analysis modules and the code hashes of the analyses are loaded in the parent
+before the workers are forked, so the workers inherit them instead of paying for the PyROOT class lookups, library
+loading and imports before their first event. The workers are long lived and take one job after the other, reusing
+what they loaded, e.g. the dataset catalog (see DatasetCatalog.sharedCatalog).
+"""
+
+import ROOT
+import importlib
+import time
+from multiprocessing import Pool
+
+import Job
+import RunManifest
+
+# ROOT classes the jobs look up, resolving them loads the dictionaries and libraries behind them
+PreloadedClasses = ["TChain", "TFile", "TH1", "TH1D", "TLorentzVector"]
+
+#======================================================================
+
+def preload(configuration):
+    """Loads everything the jobs of configuration need before their first event. Returns the time it took."""
+    start = time.time()
+    for className in PreloadedClasses:
+        getattr(ROOT, className)
+    ROOT.TLorentzVector()
+    for analysisName in Job.analysisNames(configuration):
+        RunManifest.hashModules(importlib.import_module("Analysis." + analysisName))
+    Job.derivedCodeHash(Job.analysisNames(configuration))
+    return time.time() - start
+
+def createPool(configuration, nWorkers):
+    """Preloads the jobs of configuration and forks nWorkers workers that inherit what was loaded."""
+    startupTime = preload(configuration)
+    pool = Pool(processes=nWorkers)
+    log("Preloaded ROOT and %s in %.2fs before forking %d workers" % (configuration["Analysis"], startupTime, nWorkers))
+    return pool
+
+def log(message):
+    print time.ctime() + " WorkerPool: " + message
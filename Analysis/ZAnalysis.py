@@ -11,8 +11,11 @@ class ZAnalysis(Analysis.Analysis):
   """
   def __init__(self, store):
     super(ZAnalysis, self).__init__(store)
+    self.Preselection = AH.StandardEventCutsExpression
   
   def initialize(self):
+      self.cut_EventCuts, self.cut_2_high_pt_Leptons = self.addCuts(["EventCuts", "2 high pt Leptons"])
+
       self.invMass              =  self.addStandardHistogram("invMass")
 
       self.hist_leptn           =  self.addStandardHistogram("lep_n")
@@ -53,17 +56,16 @@ class ZAnalysis(Analysis.Analysis):
   def analyze(self):
       # retrieving objects
       eventinfo = self.Store.getEventInfo()
-      weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
-      self.countEvent("no cut", weight)
+      weight = self.Store.getEventWeight() if not self.getIsData() else 1
       
       # apply standard event based selection
       if not AH.StandardEventCuts(eventinfo): return False
-      self.countEvent("EventCuts", weight)
+      self.countEvent(self.cut_EventCuts, weight)
 
       # Lepton Requirements
-      GoodLeptons = AH.selectAndSortContainer(self.Store.getLeptons(), AH.isGoodLepton, lambda p: p.pt())
+      GoodLeptons = AH.goodLeptons(self.Store)
       if not (len(GoodLeptons) == 2): return False
-      self.countEvent("2 high pt Leptons", weight)
+      self.countEvent(self.cut_2_high_pt_Leptons, weight)
 
       leadLepton  = GoodLeptons[0]
       trailLepton = GoodLeptons[1]
@@ -71,14 +73,15 @@ class ZAnalysis(Analysis.Analysis):
       # test Z candidate
       if not (leadLepton.charge() * trailLepton.charge() < 0): return False
       if not (abs(leadLepton.pdgId()) == abs(trailLepton.pdgId())): return False
-      if not (abs((leadLepton.tlv() + trailLepton.tlv()).M() - Constants.Z_Mass) < 20): return False
+      mll = AH.leadingDileptonMass(self.Store)
+      if not (abs(mll - Constants.Z_Mass) < 20): return False
 
       # Vertex Histograms
       self.hist_vxp_z.Fill(eventinfo.primaryVertexPosition(), weight)
       self.hist_pvxp_n.Fill(eventinfo.numberOfVertices(), weight)
 
       # Z boson Histograms
-      self.invMass.Fill((leadLepton.tlv() + trailLepton.tlv()).M(), weight)
+      self.invMass.Fill(mll, weight)
 
       # Missing Et Histograms
       etmiss    = self.Store.getEtMiss()
@@ -111,7 +114,7 @@ class ZAnalysis(Analysis.Analysis):
       self.hist_traillepd0.Fill(trailLepton.d0(), weight)
 
       # Jet Histograms
-      jets = AH.selectAndSortContainer(self.Store.getJets(), AH.isGoodJet, lambda p: p.pt())
+      jets = AH.goodJets(self.Store)
       self.hist_njets.Fill(len(jets), weight)
       [self.hist_jetm.Fill(jet.m(), weight) for jet in jets]
       [self.hist_jetspt.Fill(jet.pt(), weight) for jet in jets]
@@ -10,8 +10,11 @@ class ZPrimeAnalysis(Analysis.Analysis):
   """Analysis searching for an exotic Z' particle in a semileptonic top pair topology."""
   def __init__(self, store):
       super(ZPrimeAnalysis, self).__init__(store)
+      self.Preselection = AH.StandardEventCutsExpression
   
   def initialize(self):
+      self.cut_EventCuts, self.cut_1_high_pt_Leptons, self.cut_etmiss, self.cut_4_jets, self.cut_btag, self.cut_masses = self.addCuts(["EventCuts", "1 high pt Leptons", "etmiss", "4 jets", "btag", "masses"])
+
       self.WtMass            = self.addStandardHistogram("WtMass")
 
       self.hist_leptpt      =  self.addStandardHistogram("lep_pt")
@@ -39,36 +42,35 @@ class ZPrimeAnalysis(Analysis.Analysis):
   def analyze(self):
       # retrieving objects
       eventinfo = self.Store.getEventInfo()
-      weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
-      self.countEvent("no cut", weight)
+      weight = self.Store.getEventWeight() if not self.getIsData() else 1
       
       # apply standard event based selection
       if not AH.StandardEventCuts(eventinfo): return False
-      self.countEvent("EventCuts", weight)
+      self.countEvent(self.cut_EventCuts, weight)
 
       # Lepton Requirements
-      goodLeptons = AH.selectAndSortContainer(self.Store.getLeptons(), AH.isGoodLepton, lambda p: p.pt())
+      goodLeptons = AH.goodLeptons(self.Store)
       if not (len(goodLeptons) == 1): return False
-      self.countEvent("1 high pt Leptons", weight)
+      self.countEvent(self.cut_1_high_pt_Leptons, weight)
 
 
       etmiss = self.Store.getEtMiss()
       if not etmiss.et() > 30.: return False
-      self.countEvent("etmiss", weight)
+      self.countEvent(self.cut_etmiss, weight)
 
 
-      goodJets = AH.selectAndSortContainer(self.Store.getJets(), AH.isGoodJet, lambda p: p.pt())
+      goodJets = AH.goodJets(self.Store)
       if not len(goodJets) >= 4: return False
-      self.countEvent("4 jets", weight)
+      self.countEvent(self.cut_4_jets, weight)
 
       if not sum([1 for jet in goodJets if jet.mv1() >= 0.7892]) >= 1: return False
-      self.countEvent("btag", weight)
+      self.countEvent(self.cut_btag, weight)
 
       lepton = goodLeptons[0]
-      mTW = AH.WTransverseMass(lepton, etmiss)
+      mTW = AH.leadingLeptonWTransverseMass(self.Store)
       if not mTW > 30: return False;
       if not mTW + etmiss.et() > 60: return False
-      self.countEvent("masses", weight)
+      self.countEvent(self.cut_masses, weight)
       
       # vertex histograms
       self.hist_vxp_z.Fill(eventinfo.primaryVertexPosition(), weight)
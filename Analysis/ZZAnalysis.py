@@ -1,9 +1,7 @@
 import ROOT
-import itertools 
 
 import Analysis
 import AnalysisHelpers as AH
-import Constants
 
 #======================================================================
         
@@ -11,9 +9,12 @@ class ZZAnalysis(Analysis.Analysis):
   """Analysis searching for the pair production of two Z bosons decaying to leptons."""
   def __init__(self, store):
       super(ZZAnalysis, self).__init__(store)
+      self.Preselection = AH.StandardEventCutsExpression
 
   
   def initialize(self):
+      self.cut_EventCuts, self.cut_all_passed = self.addCuts(["EventCuts", "all passed"])
+
       self.invMass1          =  self.addHistogram("invMass1",          ROOT.TH1D("invMass1",     "Invariant Mass of the Z boson 1;M_{Z1} [GeV]; Events", 30, 60,120))
       self.invMass2          =  self.addHistogram("invMass2",          ROOT.TH1D("invMass2",     "Invariant Mass of the Z boson 2;M_{Z2} [GeV]; Events", 30, 60,120))
 
@@ -37,12 +38,11 @@ class ZZAnalysis(Analysis.Analysis):
   def analyze(self):
       # retrieving objects
       eventinfo = self.Store.getEventInfo()
-      weight = eventinfo.scalefactor()*eventinfo.eventWeight() if not self.getIsData() else 1
-      self.countEvent("no cut", weight)
+      weight = self.Store.getEventWeight() if not self.getIsData() else 1
 
       # apply standard event based selection
       if not AH.StandardEventCuts(eventinfo): return False
-      self.countEvent("EventCuts", weight)
+      self.countEvent(self.cut_EventCuts, weight)
       
 
       # retrieve Leptons  
@@ -51,12 +51,13 @@ class ZZAnalysis(Analysis.Analysis):
       if not goodLeptons[0].pt() > 25: return False
 
       # find ZZ Candidate
-      candidate = self.ZZCandidate(goodLeptons)
-      if candidate is None: return False;
+      pairing, doubleZWindow = AH.bestPairing(goodLeptons, 2, AH.ZWindowScore)
+      if pairing is None: return False;
+      candidate = [goodLeptons[i] for pair in pairing for i in pair]
 
       # test ZZ Candidate
-      if self.DoubleZWindow(candidate) > 30: return False;
-      self.countEvent("all passed", weight)
+      if doubleZWindow > 30: return False;
+      self.countEvent(self.cut_all_passed, weight)
  
       # vertex histograms
       self.hist_vxp_z.Fill(eventinfo.primaryVertexPosition(), weight)
@@ -67,8 +68,8 @@ class ZZAnalysis(Analysis.Analysis):
       self.hist_etmiss.Fill(etmiss.et(),weight)
       
       # ZZ system histograms
-      self.invMass1.Fill((candidate[0].tlv() + candidate[1].tlv()).M(), weight)
-      self.invMass2.Fill((candidate[2].tlv() + candidate[3].tlv()).M(), weight)
+      self.invMass1.Fill(AH.invariantMass(candidate[0], candidate[1]), weight)
+      self.invMass2.Fill(AH.invariantMass(candidate[2], candidate[3]), weight)
       
       # lepton histograms
       self.hist_leptn.Fill(len(goodLeptons), weight)
@@ -87,27 +88,6 @@ class ZZAnalysis(Analysis.Analysis):
   def finalize(self):
       pass
     
-  def ZWindow(self, lep1, lep2):
-      return abs((lep1.tlv()+lep2.tlv()).M() - Constants.Z_Mass)
-    
-  def DoubleZWindow(self, candidate):
-      return self.ZWindow(candidate[0], candidate[1]) + self.ZWindow(candidate[2], candidate[3])
-
-  def ZZCandidate(self, leptons):
-      def isValidCandidate(lep1, lep2):
-          if lep1.charge()*lep2.charge() > 0: return False
-          if abs(lep1.pdgId()) != abs(lep2.pdgId()): return False
-          return True
-    
-      bestCandidate = None
-      for p in itertools.permutations(leptons, 4):
-         if not isValidCandidate(p[0], p[1]): continue
-         if not isValidCandidate(p[2], p[3]): continue 
-         if bestCandidate is None:
-             bestCandidate = p            
-         if self.DoubleZWindow(p) < self.DoubleZWindow(bestCandidate):
-             bestCandidate = p
-      return bestCandidate
 
   
 def isGoodLepton(Lepton):
@@ -0,0 +1,53 @@
+import argparse
+import sys
+import os
+import ROOT
+import Analysis.Server as Server
+
+#======================================================================
+def printResponse(response):
+    if "Error" in response:
+        print response["Error"]
+        return
+    if response.get("Reloaded"):
+        print "Reloaded: " + ", ".join(response["Reloaded"])
+    for analysisName, samples in sorted(response["Results"].items()):
+        for processName, result in sorted(samples.items()):
+            print "%s %s: %s" % (analysisName, processName, result["Output"])
+            for cut in result["Cutflow"]:
+                print "|%20s : %20i : %17.2f |" % (cut["Cut"], cut["Events"], cut["Weighted"])
+    print "Done in %.1fs" % response["Time"]
+
+def main( argv ):
+    """
+    Starts the analysis server, or sends a request to a running one.
+    """
+    ROOT.gROOT.SetBatch()
+
+    parser = argparse.ArgumentParser( description = 'Server keeping the inputs and analyses loaded between runs' )
+    parser.add_argument('-S', '--socket',     default="analysis.sock",                   type=str,   help='location of the Unix socket of the server')
+    parser.add_argument('-r', '--run',        default=False,   action='store_const',     const=True, help='sends a run request to the server instead of starting it')
+    parser.add_argument('--stop',             default=False,   action='store_const',     const=True, help='stops the server')
+    parser.add_argument('-c', '--configfile', default="Configurations/Configuration.py", type=str,   help='configuration of the run request')
+    parser.add_argument('-a', '--analysis',   default=""                               , type=str,   help='overrides the analysis specified in configuration file, several analyses may be given comma separated')
+    parser.add_argument('-s', '--samples',    default=""                               , type=str,   help='string with comma separated list of samples to analyse')
+    parser.add_argument('-o', '--output',     default=""                               , type=str,   help='name of the output directory')
+    parser.add_argument('--no-reload',        default=False,   action='store_const',     const=True, help='does not reload changed analysis code')
+    args = parser.parse_args()
+
+    if args.stop:
+        Server.submit(args.socket, {"Command": "stop"})
+    elif args.run:
+        printResponse(Server.submit(args.socket, {
+            "Configuration"   : os.path.abspath(args.configfile),
+            "Analysis"        : args.analysis,
+            "Samples"         : args.samples,
+            "OutputDirectory" : os.path.abspath(args.output) + "/" if args.output != "" else "",
+            "Reload"          : not args.no_reload,
+        }))
+    else:
+        Server.AnalysisServer(args.socket).serve()
+
+#======================================================================
+if __name__ == "__main__":
+    main( sys.argv[1:] )
@@ -3,7 +3,20 @@ Job = {
     "Analysis"        : "TTbarAnalysis",
     "Fraction"        : 1,
     "MaxEvents"       : 1234567890,
-    "OutputDirectory" : "results/"
+    "OutputDirectory" : "results/",
+    "CacheDirectory"  : "cache/",
+    "MaxEntriesPerJob": 0,
+    "Columnar"        : False,
+    "ChunkSize"       : 10000,
+    "HistogramBackend": "ROOT",
+    "Preselection"    : False,
+    "StagedReading"   : True,
+    "BranchManifest"  : False,
+    "ColumnCache"     : True,
+    "SkimCut"         : "",
+    "SkimDirectory"   : "skims/",
+    "DerivedCache"    : False,
+    "WarmPool"        : True
 }
 
 #VBSAnalysis
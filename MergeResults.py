@@ -0,0 +1,35 @@
+import argparse
+import sys
+import glob
+import ROOT
+import Analysis.EventCounter as EventCounter
+import Analysis.Merger as Merger
+from multiprocessing import Pool
+
+#======================================================================
+def main( argv ):
+    """
+    Main function to be executed when starting the code.
+    """
+    ROOT.gROOT.SetBatch()
+
+    parser = argparse.ArgumentParser( description = 'Merges histograms and cutflows of several output files, similar to hadd' )
+    parser.add_argument('output',                                      type=str,   help='name of the merged file')
+    parser.add_argument('inputs',         nargs='+',                   type=str,   help='files to be merged, wildcards are expanded')
+    parser.add_argument('-n', '--nWorkers', default=4,                 type=int,   help='number of workers')
+    parser.add_argument('-f', '--fanIn',    default=Merger.FanIn,      type=int,   help='number of files merged in one step')
+    args = parser.parse_args()
+
+    inputs = [f for pattern in args.inputs for f in sorted(glob.glob(pattern))]
+    if not inputs:
+        print "No input files found!"
+        sys.exit(1)
+
+    mapFunction = Pool(processes=args.nWorkers).map if args.nWorkers > 1 else map
+    counters = Merger.treeMerge([(args.output, inputs, args.output)], mapFunction, args.fanIn)
+    counters[args.output].printResults()
+    counters[args.output].writeJSON(EventCounter.cutflowLocation(args.output))
+
+#======================================================================   
+if __name__ == "__main__":
+    main( sys.argv[1:] )
@@ -3,10 +3,21 @@ import sys
 import os
 import glob
 import ROOT
+import imp
 import importlib
+import pprint
+import Analysis.BranchManifest as BranchManifest
+import Analysis.ColumnCache as ColumnCache
+import Analysis.CostModel as CostModel
 import Analysis.Job as Job
+import Analysis.DatasetCatalog as DatasetCatalog
+import Analysis.JobSplitter as JobSplitter
+import Analysis.RunManifest as RunManifest
+import Analysis.TupleReader as TupleReader
+import Analysis.WorkerPool as WorkerPool
+import Analysis.WorkQueue as WorkQueue
 import Analysis.Disclaimer as DC
-from multiprocessing import Pool 
+from multiprocessing import Pool, Process
 
 def buildProcessingDict(configuration, samples):
     if samples == "": 
@@ -21,26 +32,129 @@ def buildProcessingDict(configuration, samples):
     return processingDict
 
 def checkAnalysis(configuration, analysisOption):
-    analysisName = analysisOption if analysisOption != "" else configuration.Job["Analysis"]
+    analysisNames = analysisOption if analysisOption != "" else configuration.Job["Analysis"]
+    analysisNames = [name.strip() for name in analysisNames.split(",")]
+    for analysisName in analysisNames:
+        try:
+            importedAnalysisModule = importlib.import_module("Analysis." + analysisName)
+        except ImportError:
+            print "Error when trying to read the analysis code for %s. Please check name validity" % analysisName
+            sys.exit(1)
+    configuration.Job["Analysis"] = ",".join(analysisNames)
+
+def loadConfiguration(configfile):
     try:
-        importedAnalysisModule = importlib.import_module("Analysis." + analysisName)
-        configuration.Job["Analysis"] = analysisName
+        return importlib.import_module(configfile.replace("/", ".").replace(".py",""))
     except ImportError:
-        print "Error when trying to read the analysis code for %s. Please check name validity" % analysisName
-        sys.exit(1)
+        # configurations outside of the package, e.g. the ones written for skims
+        return imp.load_source("Configuration", configfile)
 
 def BuildJob(configuration, processName, fileLocation):
     job = Job.Job(processName, configuration, fileLocation )
     return job
 
 
-def SortJobsBySize(jobs):  
-    def jobSize(job):
-        return sum([os.lstat(f).st_size for f in job.InputFiles])
-    return sorted(jobs, key=jobSize, reverse=True)
+def UpdateCatalog(configuration, jobs, mapFunction = map):
+    catalog = DatasetCatalog.sharedCatalog(configuration.get("CacheDirectory", "cache/"))
+    catalog.update([f for job in jobs for f in job.InputFiles], mapFunction)
+    return catalog
+
+def UpdateColumnCache(configuration, jobs, mapFunction = map):
+    if not (configuration.get("Columnar", False) and configuration.get("ColumnCache", False)): return
+    eventBranches, collections = TupleReader.batchBranches()
+    cache = ColumnCache.ColumnCache(configuration.get("CacheDirectory", "cache/"))
+    cache.update([f for job in jobs for f in job.InputFiles], eventBranches, collections, mapFunction)
+
+def SplitJobs(configuration, jobs, catalog, nWorkers):
+    maxEntries = configuration.get("MaxEntriesPerJob", 0)
+    if maxEntries <= 0:
+        maxEntries = JobSplitter.automaticChunkSize(jobs, catalog, nWorkers)
+    return JobSplitter.splitJobs(jobs, catalog, maxEntries)
+
+def SkipUpToDateJobs(manifest, jobs, force):
+    outdatedJobs = []
+    for job in jobs:
+        manifest.fingerprint(job)
+        if not force and manifest.isUpToDate(job):
+            print "Sample %s is up to date, skipping it. Use --force to reprocess it." % job.Name
+        else:
+            outdatedJobs.append(job)
+    return outdatedJobs
+
+def RecordJobs(manifest, jobs):
+    for job in jobs:
+        manifest.record(job)
+    manifest.save()
+
+def RemoveSkims(configuration, jobs):
+    """Removes the skims of the samples that are processed again, they may have been split differently."""
+    if not configuration.get("SkimCut", ""): return
+    for job in jobs:
+        for analysisName in job.AnalysisNames:
+            for skim in glob.glob(os.path.join(Job.skimDirectory(configuration, job.Name, analysisName), "skim*.root")):
+                os.remove(skim)
+
+def WriteSkimConfigurations(configuration, processNames):
+    """Writes <SkimDirectory>/<AnalysisName>/Configuration.py with the Processes pointing at the skims."""
+    if not configuration.get("SkimCut", ""): return
+    for analysisName in Job.analysisNames(configuration):
+        processes = {}
+        for processName in processNames:
+            skims = os.path.join(Job.skimDirectory(configuration, processName, analysisName), "skim*.root")
+            if glob.glob(skims):
+                processes[processName] = skims
+        if not processes: continue
+        directory = os.path.join(configuration.get("SkimDirectory", "skims/"), analysisName)
+        location = os.path.join(directory, "Configuration.py")
+        # the skims hold the selected events of the whole sample, so they are always read completely
+        job = dict(configuration, Analysis=analysisName, SkimCut="", Fraction=1, MaxEvents=1234567890,
+                   OutputDirectory=os.path.join(directory, "results/"))
+        with open(location, "w") as configurationFile:
+            configurationFile.write("# Skims of %s with the events passing %s, run with: python RunScript.py -c %s\n\n" % (analysisName, configuration["SkimCut"], location))
+            configurationFile.write("Job = %s\n\n" % pprint.pformat(job))
+            configurationFile.write("Processes = %s\n" % pprint.pformat(processes))
+        print "Configuration for the skims of %s written to %s" % (analysisName, location)
+
+def ScheduleJobs(costModel, jobs, catalog):
+    predictions = [costModel.predict(job, catalog) for job in jobs]
+    return CostModel.schedule(jobs, predictions)
 
 def RunJob(job):
     job.run()
+    return job.MaxEvents, job.JobStatistics.elapsedTime()
+
+def RecordTimes(costModel, jobs, predictions, results):
+    for job, (entries, seconds) in zip(jobs, results):
+        costModel.record(job, entries, seconds)
+    costModel.report(jobs, predictions, [seconds for entries, seconds in results])
+    costModel.save()
+
+def RunQueue(queueDirectory, jobs, nLocalWorkers):
+    """Publishes the jobs to the work queue, starts nLocalWorkers workers on this machine and waits until all jobs
+    are done. Returns the (entries, seconds) of the jobs, None if a job failed."""
+    queue = WorkQueue.WorkQueue(queueDirectory)
+    queue.publish(jobs)
+    workers = [Process(target=WorkQueue.work, args=(queueDirectory,)) for i in range(nLocalWorkers)]
+    for worker in workers:
+        worker.start()
+    results = queue.coordinate()
+    for worker in workers:
+        worker.join()
+    return results
+
+def RecordBranches(configuration, processingDict, nEntries):
+    """Records the branches every analysis reads in the first nEntries entries of each sample."""
+    cacheDirectory = configuration.get("CacheDirectory", "cache/")
+    recordingConfiguration = dict(configuration, Batch=True, MaxEvents=nEntries, Fraction=1, Columnar=False, Preselection=False,
+                                  BranchManifest=False, DerivedCache=False, OutputDirectory=os.path.join(cacheDirectory, "branches", "recording/"))
+    manifest = BranchManifest.BranchManifest(cacheDirectory)
+    for analysisName in Job.analysisNames(configuration):
+        branches = set()
+        for processName, fileLocation in processingDict.items():
+            job = Job.Job(processName, dict(recordingConfiguration, Analysis=analysisName), fileLocation)
+            branches.update(job.recordBranches())
+        manifest.write(analysisName, branches)
+        print "Analysis %s reads %d branches: %s" % (analysisName, len(branches), ", ".join(sorted(branches)))
 
  
 #======================================================================
@@ -55,13 +169,20 @@ def main( argv ):
     parser.add_argument('-n', '--nWorkers',   default=4,                                 type=int,   help='number of workers' )  
     parser.add_argument('-p', '--parallel',   default=False,   action='store_const',     const=True, help='enables running in parallel')
     parser.add_argument('-c', '--configfile', default="Configurations/Configuration.py", type=str,   help='files to be analysed')
-    parser.add_argument('-a', '--analysis',   default=""                               , type=str,   help='overrides the analysis specified in configuration file')
+    parser.add_argument('-a', '--analysis',   default=""                               , type=str,   help='overrides the analysis specified in configuration file, several analyses may be given comma separated')
     parser.add_argument('-s', '--samples',    default=""                               , type=str,   help='string with comma separated list of samples to analyse')
     parser.add_argument('-o', '--output',     default=""                               , type=str,   help='name of the output directory')
+    parser.add_argument('-f', '--force',      default=False,   action='store_const',     const=True, help='reprocesses samples whose output is up to date')
+    parser.add_argument('-r', '--record-branches', default=0,                           type=int,   help='records the branches read by the analyses in this many entries per sample and exits')
+    parser.add_argument('-q', '--queue',      default=""                               , type=str,   help='runs the jobs through a work queue in this directory, with -n workers on this machine')
+    parser.add_argument('-w', '--work',       default=""                               , type=str,   help='runs as worker of the work queue in this directory until the run is finished')
     args = parser.parse_args()
+
+    if args.work != "":
+        WorkQueue.work(args.work)
+        return
     
-    configModuleName = args.configfile.replace("/", ".").replace(".py","")
-    configuration = importlib.import_module(configModuleName)
+    configuration = loadConfiguration(args.configfile)
   
     configuration.Job["OutputDirectory"] = args.output + "/" if args.output != "" else configuration.Job["OutputDirectory"]
     if not os.path.exists(configuration.Job["OutputDirectory"]):
@@ -70,16 +191,57 @@ def main( argv ):
     checkAnalysis(configuration, args.analysis)
     processingDict = buildProcessingDict(configuration, args.samples)
 
+    if args.record_branches > 0:
+        RecordBranches(configuration.Job, processingDict, args.record_branches)
+        return
+
+    manifest = RunManifest.RunManifest(configuration.Job)
+    jobs = [BuildJob(configuration.Job, processName, fileLocation) for processName, fileLocation in processingDict.items()]
+    jobs = SkipUpToDateJobs(manifest, jobs, args.force)
+    RemoveSkims(configuration.Job, jobs)
+    costModel = CostModel.CostModel(configuration.Job.get("CacheDirectory", "cache/"))
+
     if (args.parallel):
         configuration.Job["Batch"] = True
-        jobs = [BuildJob(configuration.Job, processName, fileLocation) for processName, fileLocation in processingDict.items()]
-        jobs = SortJobsBySize(jobs)
-        pool = Pool(processes=args.nWorkers)              # start with n worker processes
-        pool.map(RunJob, jobs, chunksize=1)
+        sampleJobs = jobs
+        if configuration.Job.get("WarmPool", False):
+            pool = WorkerPool.createPool(configuration.Job, args.nWorkers)
+        else:
+            pool = Pool(processes=args.nWorkers)          # start with n worker processes
+        catalog = UpdateCatalog(configuration.Job, jobs, pool.map)
+        UpdateColumnCache(configuration.Job, jobs, pool.map)
+        jobs = SplitJobs(configuration.Job, jobs, catalog, args.nWorkers)
+        jobs, predictions = ScheduleJobs(costModel, jobs, catalog)
+        results = pool.map(RunJob, jobs, chunksize=1)
+        RecordTimes(costModel, jobs, predictions, results)
+        JobSplitter.mergeChunks(jobs, pool.map)
+        RecordJobs(manifest, sampleJobs)
+
+    elif args.queue != "":
+        configuration.Job["Batch"] = True
+        sampleJobs = jobs
+        catalog = UpdateCatalog(configuration.Job, jobs)
+        UpdateColumnCache(configuration.Job, jobs)
+        jobs = SplitJobs(configuration.Job, jobs, catalog, max(args.nWorkers, 1))
+        jobs, predictions = ScheduleJobs(costModel, jobs, catalog)
+        results = RunQueue(args.queue, jobs, args.nWorkers)
+        if results is None:
+            sys.exit(1)
+        RecordTimes(costModel, jobs, predictions, results)
+        JobSplitter.mergeChunks(jobs)
+        RecordJobs(manifest, sampleJobs)
 
     else:
-        for processName, fileLocation in processingDict.items():
-            RunJob(BuildJob(configuration.Job, processName, fileLocation))      
+        catalog = UpdateCatalog(configuration.Job, jobs)
+        UpdateColumnCache(configuration.Job, jobs)
+        jobs, predictions = ScheduleJobs(costModel, jobs, catalog)
+        results = []
+        for job in jobs:
+            results.append(RunJob(job))
+            RecordJobs(manifest, [job])
+        RecordTimes(costModel, jobs, predictions, results)
+
+    WriteSkimConfigurations(configuration.Job, processingDict.keys())
   
 #======================================================================   
 if __name__ == "__main__":